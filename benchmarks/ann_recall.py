@@ -0,0 +1,122 @@
+"""Compare FAISS index types on synthetic vectors: recall@k against exact search vs. latency.
+
+Vectors are drawn around random cluster centres so they look more like real
+embeddings than uniform noise. Ground truth comes from an exact float32 flat
+index with the same metric, so compressed storage (float16, PQ) is measured
+against full precision. Storage modes resolve the way the store builds them
+(pq is float16 below ``ann.PQ_MIN_VECTORS``) and each resulting index is
+measured once. With ``--min-recall`` the script exits non-zero if any of them
+falls below it, which makes it usable as a regression check.
+
+Usage: python -m benchmarks.ann_recall --vectors 20000 --queries 500 --k 5
+       python -m benchmarks.ann_recall --metric cosine --storage float32 float16 pq --min-recall 0.9
+"""
+import argparse
+import sys
+import time
+
+import faiss
+import numpy as np
+
+from scrapper import ann
+from scrapper.scrapper import Config
+
+
+def synthetic_vectors(n: int, dimension: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    centres = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    labels = rng.integers(0, clusters, n)
+    vectors = centres[labels] + 0.35 * rng.standard_normal((n, dimension)).astype(np.float32)
+    return np.ascontiguousarray(vectors, dtype=np.float32)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dimension", type=int, default=Config.EMBEDDING_DIMENSION)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--types", nargs="+", default=list(ann.INDEX_TYPES))
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[Config.FAISS_NPROBE])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[Config.FAISS_EF_SEARCH])
+    parser.add_argument("--metric", choices=sorted(ann.METRICS), default=Config.VECTOR_METRIC)
+    parser.add_argument("--storage", nargs="+", choices=ann.STORAGE_MODES, default=[Config.VECTOR_STORAGE])
+    parser.add_argument("--min-recall", type=float, default=None, help="exit 1 if any configuration scores below this")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    corpus = synthetic_vectors(args.vectors, args.dimension, args.clusters, rng)
+    queries = synthetic_vectors(args.queries, args.dimension, args.clusters, rng)
+    metric = ann.METRICS[args.metric]
+    if metric == faiss.METRIC_INNER_PRODUCT:
+        # Same as the store does: unit vectors, so inner product is cosine similarity
+        faiss.normalize_L2(corpus)
+        faiss.normalize_L2(queries)
+
+    exact = faiss.IndexFlat(args.dimension, metric)
+    exact.add(corpus)
+    _, truth = exact.search(queries, args.k)
+
+    print(f"{args.vectors} vectors x {args.dimension} dims, {args.queries} queries, recall@{args.k}, metric {args.metric}")
+    if "pq" in args.storage and ann.storage_for("pq", args.vectors) != "pq":
+        print(f"pq storage needs at least {ann.PQ_MIN_VECTORS} vectors; these indexes use float16 instead")
+    print(f"{'index':<40} {'build s':>8} {'ms/query':>9} {'recall':>7} {'B/vector':>9} {'MB':>8}")
+    failures = []
+    built = set()
+    for index_type in args.types:
+        for storage in args.storage:
+            # Different requests can resolve to the same index, e.g. ivf_pq with any storage
+            description = ann.factory_string(index_type, args.vectors, args.dimension, Config.FAISS_HNSW_M, storage)
+            if description in built:
+                continue
+            built.add(description)
+            failures += run(args, corpus, queries, truth, index_type, storage, metric, description)
+
+    if failures:
+        print(f"Recall below {args.min_recall}: {', '.join(failures)}")
+        sys.exit(1)
+
+
+def run(args, corpus, queries, truth, index_type: str, storage: str, metric: int, description: str):
+    started = time.perf_counter()
+    index = ann.build_index(
+        corpus, index_type, args.nprobe[0], args.ef_search[0], Config.FAISS_HNSW_M, metric=metric, storage=storage
+    )
+    build_seconds = time.perf_counter() - started
+    per_vector = ann.bytes_per_vector(index)
+    size_mb = per_vector * index.ntotal / 1e6
+
+    # Sweep the knob this index type actually has
+    if index_type == "hnsw":
+        settings = [(args.nprobe[0], e) for e in args.ef_search]
+    elif index_type.startswith("ivf"):
+        settings = [(n, args.ef_search[0]) for n in args.nprobe]
+    else:
+        settings = [(args.nprobe[0], args.ef_search[0])]
+
+    failures = []
+    for nprobe, ef_search in settings:
+        ann.set_search_params(index, nprobe, ef_search)
+        # Search one query at a time, like the chat path does
+        started = time.perf_counter()
+        found = np.vstack([index.search(q.reshape(1, -1), args.k)[1] for q in queries])
+        ms_per_query = (time.perf_counter() - started) * 1000 / len(queries)
+        recall = recall_at_k(found, truth)
+        label = description
+        if index_type == "hnsw":
+            label += f" efSearch={ef_search}"
+        elif index_type.startswith("ivf"):
+            label += f" nprobe={nprobe}"
+        print(f"{label:<40} {build_seconds:8.2f} {ms_per_query:9.3f} {recall:7.3f} {per_vector:9.1f} {size_mb:8.1f}")
+        if args.min_recall is not None and recall < args.min_recall:
+            failures.append(label)
+    return failures
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Connect-to-ready latency of voice bots: a process per call vs the warm pool.
+
+Both modes run benchmarks/stub_bot.py, which has voice_bot's worker protocol
+but only sleeps to simulate start-up (``--warmup``) and joining a room
+(``--join``). A process per call pays both on every call; the pool pays
+start-up in the background and only joining on the call path, as long as
+calls arrive no faster than idle workers are replaced.
+
+Usage: python -m benchmarks.bot_pool --calls 20 --interval 0.5 --warmup 2 --join 0.1
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+from bot_pool import BotPool, PoolExhausted
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def summary(values):
+    p95 = statistics.quantiles(values, n=20)[-1] if len(values) > 1 else values[0]
+    return f"p50 {statistics.median(values) * 1000:7.0f} ms  p95 {p95 * 1000:7.0f} ms  max {max(values) * 1000:7.0f} ms"
+
+
+async def process_per_call(calls: int, interval: float):
+    async def call():
+        started = time.perf_counter()
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "benchmarks.stub_bot", stdout=asyncio.subprocess.PIPE, cwd=ROOT
+        )
+        await proc.stdout.readline()
+        elapsed = time.perf_counter() - started
+        await proc.wait()
+        return elapsed
+
+    tasks = []
+    for _ in range(calls):
+        tasks.append(asyncio.create_task(call()))
+        await asyncio.sleep(interval)
+    return await asyncio.gather(*tasks)
+
+
+async def pooled(calls: int, interval: float, args):
+    pool = BotPool(args.pool_size, args.pool_max, args.max_sessions, python_path=sys.executable, cwd=ROOT,
+                   module="benchmarks.stub_bot")
+    await pool.start()
+    # Let the initial workers warm up, as they would while the server idles
+    while pool.stats()["idle"] < pool.min_idle:
+        await asyncio.sleep(0.05)
+    rejected = 0
+    for i in range(calls):
+        try:
+            await pool.assign(f"https://example.daily.co/room-{i}", "token", 1, "https://example.com")
+        except PoolExhausted:
+            rejected += 1
+        await asyncio.sleep(interval)
+    while pool.connect_to_ready.count + rejected < calls:
+        await asyncio.sleep(0.05)
+    stats = pool.stats()
+    await pool.shutdown()
+    return stats, rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between incoming calls")
+    parser.add_argument("--warmup", type=float, default=2.0, help="simulated bot start-up time")
+    parser.add_argument("--join", type=float, default=0.1, help="simulated time to join a room")
+    parser.add_argument("--call", type=float, default=1.0, help="simulated call length")
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--pool-max", type=int, default=8)
+    parser.add_argument("--max-sessions", type=int, default=5)
+    args = parser.parse_args()
+    os.environ.update(STUB_BOT_WARMUP=str(args.warmup), STUB_BOT_JOIN=str(args.join), STUB_BOT_CALL=str(args.call))
+
+    print(f"{args.calls} calls every {args.interval}s, start-up {args.warmup}s, join {args.join}s, call {args.call}s")
+    latencies = asyncio.run(process_per_call(args.calls, args.interval))
+    print(f"process per call: connect to ready {summary(latencies)}")
+
+    stats, rejected = asyncio.run(pooled(args.calls, args.interval, args))
+    ready = stats["connect_to_ready"]
+    print(f"warm pool:        connect to ready p50 {ready['p50_ms']:7.0f} ms  p95 {ready['p95_ms']:7.0f} ms  "
+          f"max {ready['max_ms']:7.0f} ms  ({rejected} rejected)")
+    stats.pop("pool")
+    print(json.dumps({key: value for key, value in stats.items() if key not in ("connect_to_ready", "warmup")}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Load test for POST /chat/ask: requests/second as concurrency grows.
+
+The routes are served by uvicorn on a local port, in a background thread,
+against local stubs of the Cloudflare embedding endpoint and the Groq chat
+endpoint. Each LLM call
+takes ``--llm-latency`` seconds, so a handler that blocks the event loop caps
+throughput at 1 / latency no matter the concurrency, while a non-blocking one
+scales roughly linearly until something else saturates.
+
+With ``--stream`` requests go to /chat/ask/stream instead, and time to first
+token is reported next to total latency.
+
+The load repeats 30 distinct questions, so the semantic answer cache is
+disabled unless ``--answer-cache`` is given; with it, the hit rate is reported.
+
+Usage: python -m benchmarks.chat_load --requests 64 --concurrency 1 4 16 --llm-latency 0.5
+       python -m benchmarks.chat_load --stream --token-latency 0.02
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+
+from benchmarks.embedding_throughput import embedding_route
+from benchmarks.stubs import StubServer, chat_completion_route
+
+
+def site_page(i: int) -> str:
+    paragraphs = "".join(f"<p>Section {n} of the load test site describes product P{i}-{n}.</p>" for n in range(30))
+    return f"<html><body><h1>Load test page {i}</h1>{paragraphs}</body></html>"
+
+
+async def load(client, website_id: int, requests: int, concurrency: int, stream: bool = False):
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+    first_tokens = []
+
+    async def ask(i):
+        data = {"id": website_id, "query": f"What is product P0-{i % 30}?"}
+        async with slots:
+            started = time.perf_counter()
+            if not stream:
+                response = await client.post("/chat/ask", data=data)
+                response.raise_for_status()
+            else:
+                first_token = None
+                async with client.stream("POST", "/chat/ask/stream", data=data) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if line == "event: token" and first_token is None:
+                            first_token = time.perf_counter() - started
+                        elif line == "event: error":
+                            raise RuntimeError("stream reported an error")
+                first_tokens.append(first_token)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(ask(i) for i in range(requests)))
+    return time.perf_counter() - started, latencies, first_tokens
+
+
+def percentiles(values):
+    p95 = statistics.quantiles(values, n=20)[-1] if len(values) > 1 else values[0]
+    return f"p50 {statistics.median(values) * 1000:7.0f} ms  p95 {p95 * 1000:7.0f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--embed-latency", type=float, default=0.05)
+    parser.add_argument("--stream", action="store_true", help="use /chat/ask/stream and report time to first token")
+    parser.add_argument("--token-latency", type=float, default=0.02, help="delay between streamed words")
+    parser.add_argument("--answer-cache", action="store_true", help="keep the semantic answer cache enabled")
+    args = parser.parse_args()
+
+    answer = " ".join(f"word{i}" for i in range(40))
+    routes = {
+        "/embed": embedding_route(args.embed_latency, 0.0),
+        "/chat/completions": chat_completion_route(args.llm_latency, answer, args.token_latency),
+    }
+    routes["/site/0"] = lambda body: (200, "text/html", site_page(0))
+    with StubServer(routes) as server:
+        # database.py creates main.db in the working directory, and the app's
+        # store and cache paths are relative too, so run from a scratch dir
+        os.environ["GROQ_BASE_URL"] = server.url
+        os.environ.setdefault("GROQ_API_KEY", "stub")
+        os.chdir(tempfile.mkdtemp(prefix="chat-load-"))
+
+        import httpx
+        import uvicorn
+        from fastapi import FastAPI
+
+        import models
+        import routes as app_routes
+        from crud import DatabaseHelper
+        from database import engine
+        from scrapper.scrapper import ANSWER_CACHE, Config, EmbeddingService
+
+        Config.CLOUDFLARE_API_URL = f"{server.url}/embed"
+        if not args.answer_cache:
+            ANSWER_CACHE.max_entries_per_site = 0
+        models.Base.metadata.create_all(bind=engine)
+        website = DatabaseHelper().create(models.Website, {"url": f"{server.url}/site/0", "sublinks": 0})
+        EmbeddingService().scrape_website(website.id, website.url)
+
+        app = FastAPI()
+        app.include_router(app_routes.router)
+        # A real server, since httpx's ASGI transport buffers whole responses
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        app_server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+        threading.Thread(target=app_server.run, kwargs={"sockets": [sock]}, daemon=True).start()
+        while not app_server.started:
+            time.sleep(0.05)
+        app_url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+        async def run():
+            limits = httpx.Limits(max_connections=max(args.concurrency))
+            async with httpx.AsyncClient(base_url=app_url, timeout=120, limits=limits) as client:
+                # Warm up: load the store into the index cache
+                await load(client, website.id, 1, 1)
+                print(f"{args.requests} requests, LLM latency {args.llm_latency}s, embedding latency {args.embed_latency}s")
+                for concurrency in args.concurrency:
+                    elapsed, latencies, first_tokens = await load(
+                        client, website.id, args.requests, concurrency, args.stream
+                    )
+                    line = f"concurrency {concurrency:>3}: {args.requests / elapsed:7.2f} req/s  total {percentiles(latencies)}"
+                    if first_tokens:
+                        line += f"  first token {percentiles(first_tokens)}"
+                    print(line)
+                if args.answer_cache:
+                    print(f"answer cache hit rate {ANSWER_CACHE.stats()['hit_rate']:.0%}")
+
+        asyncio.run(run())
+        app_server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
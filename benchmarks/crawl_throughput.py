@@ -0,0 +1,64 @@
+"""Crawl a local fixture site and report pages/second at different concurrency levels.
+
+Every fixture page links to a handful of others (plus duplicate and off-site
+links) and is served after ``--latency`` seconds, like a slow origin.
+
+Usage: python -m benchmarks.crawl_throughput --pages 200 --latency 0.05
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.stubs import StubServer
+from scrapper.crawler import Crawler
+from scrapper.scrapper import DocumentProcessor
+
+
+def fixture_page(i: int, pages: int) -> str:
+    links = "".join(
+        f'<a href="/page/{(i * 7 + n) % pages}">next</a><a href="/page/{(i * 7 + n) % pages}/#top">again</a>'
+        for n in range(1, 6)
+    )
+    links += '<a href="https://elsewhere.example/">off-site</a><a href="/logo.png">logo</a>'
+    return f"<html><body><h1>Page {i}</h1><p>Fixture page number {i} with some text.</p>{links}</body></html>"
+
+
+def fixture_routes(pages: int, latency: float):
+    def route(i):
+        def handler(body):
+            time.sleep(latency)
+            return 200, "text/html; charset=utf-8", fixture_page(i, pages)
+        return handler
+    return {f"/page/{i}": route(i) for i in range(pages)}
+
+
+async def crawl(url: str, pages: int, concurrency: int, per_host: int):
+    crawler = Crawler(
+        url,
+        max_pages=pages,
+        extract_text=DocumentProcessor.extract_text,
+        concurrency=concurrency,
+        per_host_concurrency=per_host,
+    )
+    started = time.perf_counter()
+    count = 0
+    async for _ in crawler.crawl():
+        count += 1
+    return count, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    with StubServer(fixture_routes(args.pages, args.latency)) as server:
+        for concurrency in args.concurrency:
+            count, elapsed = asyncio.run(crawl(f"{server.url}/page/0", args.pages, concurrency, concurrency))
+            print(f"concurrency {concurrency:>3}: {count} pages in {elapsed:6.2f}s  {count / elapsed:8.1f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Measure CloudflareEmbedding chunks/second against a local stub of the bge endpoint.
+
+The stub answers like Workers AI (``{"result": {"data": [...]}}``) and sleeps
+``--request-latency`` per request plus ``--text-latency`` per text, which is
+roughly how the real endpoint behaves.
+
+Usage: python -m benchmarks.embedding_throughput --chunks 500 --request-latency 0.08
+"""
+import argparse
+import json
+import time
+
+from benchmarks.stubs import StubServer, hash_embedding
+from scrapper.scrapper import CloudflareEmbedding, Config
+
+
+def embedding_route(request_latency: float, text_latency: float):
+    def route(body: bytes):
+        texts = json.loads(body)["text"]
+        if isinstance(texts, str):
+            texts = [texts]
+        time.sleep(request_latency + text_latency * len(texts))
+        data = [hash_embedding(text) for text in texts]
+        payload = {"result": {"shape": [len(data), Config.EMBEDDING_DIMENSION], "data": data}, "success": True}
+        return 200, "application/json", json.dumps(payload)
+    return route
+
+
+def chunks(n: int):
+    return [f"Chunk {i} of the benchmark corpus. " * 12 for i in range(n)]
+
+
+def run(label: str, embed, texts):
+    started = time.perf_counter()
+    embeddings = embed(texts)
+    elapsed = time.perf_counter() - started
+    assert len(embeddings) == len(texts)
+    print(f"{label:<28} {len(texts)} chunks in {elapsed:6.2f}s  {len(texts) / elapsed:8.1f} chunks/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=500)
+    parser.add_argument("--request-latency", type=float, default=0.08)
+    parser.add_argument("--text-latency", type=float, default=0.001)
+    parser.add_argument("--batch-size", type=int, default=Config.EMBED_BATCH_SIZE)
+    parser.add_argument("--max-batch-bytes", type=int, default=Config.EMBED_MAX_BATCH_BYTES)
+    args = parser.parse_args()
+
+    route = embedding_route(args.request_latency, args.text_latency)
+    with StubServer({"/embed": route}) as server:
+        Config.CLOUDFLARE_API_URL = f"{server.url}/embed"
+        texts = chunks(args.chunks)
+
+        model = CloudflareEmbedding(embed_batch_size=args.batch_size, max_batch_bytes=args.max_batch_bytes)
+        run("one request per chunk", lambda t: [model._get_text_embedding(x) for x in t], texts)
+        run(f"batched (<= {args.batch_size}/request)", model.get_text_embedding_batch, texts)
+
+
+if __name__ == "__main__":
+    main()
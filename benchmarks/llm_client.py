@@ -0,0 +1,108 @@
+"""Exercise the shared LLM client against a local OpenAI-compatible stub.
+
+Compares a fresh client per request (the old GroqService behaviour) with the
+shared pooled LLMClient: throughput, TCP connections opened, and how the
+pooled client's limiter, retries and latency histograms behave when the stub
+answers a fraction of requests with 429 Too Many Requests.
+
+Usage: python -m benchmarks.llm_client --requests 200 --concurrency 32 --latency 0.1 --rate-limited 0.1
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+
+os.environ.setdefault("GROQ_API_KEY", "stub")
+
+import openai
+
+from benchmarks.stubs import StubServer, chat_completion_route
+from llm import GROQ_MODEL, LLMClient
+
+MESSAGES = [{"role": "user", "content": "Hello"}]
+
+
+def instrumented(route, rate_limited: float, seed: int = 0):
+    """Wrap a route to record peak concurrency and reject a share of requests with 429."""
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    state = {"in_flight": 0, "peak": 0, "rejected": 0}
+
+    def handler(body: bytes):
+        with lock:
+            if rng.random() < rate_limited:
+                state["rejected"] += 1
+                error = {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}}
+                return 429, "application/json", json.dumps(error), {"Retry-After": "0"}
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+        try:
+            return route(body)
+        finally:
+            with lock:
+                state["in_flight"] -= 1
+
+    return handler, state
+
+
+async def run_fresh_clients(url: str, requests: int, concurrency: int):
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with slots:
+            client = openai.AsyncOpenAI(api_key="stub", base_url=url)
+            try:
+                await client.chat.completions.create(model=GROQ_MODEL, messages=MESSAGES)
+            finally:
+                await client.close()
+
+    await asyncio.gather(*(one() for _ in range(requests)), return_exceptions=True)
+
+
+async def run_shared_client(client: LLMClient, requests: int):
+    results = await asyncio.gather(
+        *(client.complete(MESSAGES, model=GROQ_MODEL) for _ in range(requests)), return_exceptions=True
+    )
+    return sum(isinstance(result, Exception) for result in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32, help="limiter size of the shared client")
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--rate-limited", type=float, default=0.1, help="share of requests answered with 429")
+    args = parser.parse_args()
+
+    route, state = instrumented(chat_completion_route(args.latency), args.rate_limited)
+    with StubServer({"/chat/completions": route}) as server:
+        started = time.perf_counter()
+        asyncio.run(run_fresh_clients(server.url, args.requests, args.concurrency))
+        elapsed = time.perf_counter() - started
+        print(f"fresh client per request: {args.requests / elapsed:7.1f} req/s, "
+              f"{server.connections} connections, peak {state['peak']} concurrent")
+
+        server.connections = 0
+        state["peak"] = 0
+        client = LLMClient(base_url=server.url, max_concurrency=args.concurrency)
+
+        async def shared():
+            try:
+                return await run_shared_client(client, args.requests)
+            finally:
+                await client.aclose()
+
+        started = time.perf_counter()
+        failed = asyncio.run(shared())
+        elapsed = time.perf_counter() - started
+        print(f"shared pooled client:     {args.requests / elapsed:7.1f} req/s, "
+              f"{server.connections} connections, peak {state['peak']} concurrent "
+              f"(limit {args.concurrency}), {failed} failed")
+        print(json.dumps(client.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Scrape and query many websites in parallel and check no store leaks into another.
+
+Usage: python -m benchmarks.stress_websites --sites 32 --queries 20 --workers 16
+"""
+import argparse
+import random
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stubs import HashEmbedding, StubServer
+from scrapper.scrapper import INDEX_CACHE, Config, EmbeddingService
+
+MARKER = re.compile(r"tok\d+x")
+
+
+def site_page(i: int) -> str:
+    paragraphs = "".join(
+        f"<p>Website {i} paragraph {n} is about tok{i}x and nothing else. "
+        f"Opening hours for tok{i}x are listed here.</p>"
+        for n in range(20)
+    )
+    return f"<html><body><h1>Site tok{i}x</h1>{paragraphs}</body></html>"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sites", type=int, default=32)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    Config.WEBSITES_DIR = tempfile.mkdtemp(prefix="stress-websites-")
+    routes = {f"/site/{i}": (lambda body, i=i: (200, "text/html", site_page(i))) for i in range(args.sites)}
+    service = EmbeddingService(embed_model=HashEmbedding())
+
+    with StubServer(routes) as server:
+        url = lambda i: f"{server.url}/site/{i}"
+
+        # Interleave scrapes and queries of every site so both paths race
+        jobs = [("scrape", i) for i in range(args.sites)]
+        jobs += [("query", i) for i in range(args.sites) for _ in range(args.queries)]
+        random.shuffle(jobs)
+
+        def run(job):
+            kind, i = job
+            if kind == "scrape":
+                service.scrape_website(i, url(i))
+                return kind, i, None
+            return kind, i, service.query(i, url(i), f"What are the opening hours for tok{i}x?")
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            results = list(pool.map(run, jobs))
+        elapsed = time.perf_counter() - started
+
+    failures = 0
+    for kind, i, result in results:
+        if kind != "query":
+            continue
+        markers = set(MARKER.findall(" ".join(chunk["content"] for chunk in result or [])))
+        if markers - {f"tok{i}x"}:
+            failures += 1
+            print(f"website {i}: expected only tok{i}x, got {sorted(markers)}")
+
+    print(f"{len(jobs)} jobs over {args.sites} websites in {elapsed:.2f}s "
+          f"({len(jobs) / elapsed:.1f} jobs/s), {failures} cross-contaminated results")
+    print(f"index cache: {INDEX_CACHE.stats()}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
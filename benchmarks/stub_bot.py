@@ -0,0 +1,65 @@
+"""Stand-in for voice_bot with the same worker protocol and no pipecat.
+
+Start-up cost is simulated by sleeping STUB_BOT_WARMUP seconds (imports,
+VAD model load), joining a room by STUB_BOT_JOIN, and a call lasts
+STUB_BOT_CALL seconds unless the pool sends "end". A worker runs as many
+calls at once as the pool hands it. Without --worker it
+behaves like a one-shot bot and prints "joined" once in the room.
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+WARMUP = float(os.getenv("STUB_BOT_WARMUP", 2.0))
+JOIN = float(os.getenv("STUB_BOT_JOIN", 0.1))
+CALL = float(os.getenv("STUB_BOT_CALL", 1.0))
+
+
+def send(event, **fields):
+    sys.stdout.write(json.dumps({"event": event, **fields}) + "\n")
+    sys.stdout.flush()
+
+
+async def call(command, ended: asyncio.Event):
+    await asyncio.sleep(JOIN)
+    send("joined", room_url=command["room_url"])
+    try:
+        await asyncio.wait_for(ended.wait(), CALL)
+    except asyncio.TimeoutError:
+        pass
+    send("ended", room_url=command["room_url"])
+
+
+async def worker():
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    time.sleep(WARMUP)
+    send("ready", pid=os.getpid())
+    # Calls in progress by room URL; the pool decides how many run at once
+    calls = {}
+    while True:
+        line = await reader.readline()
+        command = json.loads(line) if line.strip() else {"command": "stop"}
+        if command["command"] == "stop":
+            break
+        if command["command"] == "start":
+            ended = asyncio.Event()
+            calls[command["room_url"]] = (asyncio.create_task(call(command, ended)), ended)
+        elif command["command"] == "end":
+            for room_url, (_, ended) in calls.items():
+                if command.get("room_url") in (None, room_url):
+                    ended.set()
+    for _, ended in calls.values():
+        ended.set()
+    await asyncio.gather(*(task for task, _ in calls.values()))
+
+
+if __name__ == "__main__":
+    if "--worker" in sys.argv:
+        asyncio.run(worker())
+    else:
+        time.sleep(WARMUP + JOIN)
+        send("joined")
@@ -0,0 +1,154 @@
+"""Local stand-ins for external services, shared by the benchmark scripts."""
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding
+
+from scrapper.scrapper import Config
+
+
+def hash_embedding(text: str, dimension: int = Config.EMBEDDING_DIMENSION) -> List[float]:
+    """Deterministic bag-of-words embedding: texts sharing words end up close."""
+    vector = np.zeros(dimension, dtype=np.float32)
+    for word in re.findall(r"\w+", text.lower()):
+        digest = hashlib.md5(word.encode("utf-8")).digest()
+        vector[int.from_bytes(digest[:4], "little") % dimension] += 1.0
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector.tolist()
+
+
+class HashEmbedding(BaseEmbedding):
+    """Embedding model that never leaves the process."""
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return hash_embedding(text)
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return hash_embedding(query)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return hash_embedding(query)
+
+
+def chat_completion_route(latency: float, answer: str = "Stub answer.", token_latency: float = 0.0):
+    """OpenAI-compatible /chat/completions handler that answers after ``latency`` seconds.
+
+    Streaming requests get the answer word by word as SSE chunks, the first
+    after ``latency`` and each next one ``token_latency`` later.
+    """
+    def stream(model: str):
+        time.sleep(latency)
+        for i, word in enumerate(answer.split(" ")):
+            if i:
+                time.sleep(token_latency)
+            chunk = {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": word if i == 0 else f" {word}"}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    def route(body: bytes):
+        request = json.loads(body)
+        if request.get("stream"):
+            return 200, "text/event-stream", stream(request.get("model", "stub"))
+        time.sleep(latency)
+        payload = {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+        return 200, "application/json", json.dumps(payload)
+    return route
+
+
+class StubServer:
+    """Threaded HTTP server on an ephemeral localhost port.
+
+    ``routes`` maps a path to a callable that takes the request body and
+    returns ``(status, content_type, body)``, optionally followed by a dict
+    of extra headers. A body that is an iterator is
+    sent with chunked encoding, one chunk per item, as it is produced.
+    """
+
+    def __init__(self, routes: Dict[str, Callable[[bytes], Any]]):
+        routes = dict(routes)
+        stub = self
+        # TCP connections accepted so far; shows whether clients reuse keep-alive connections
+        self.connections = 0
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                stub.connections += 1
+                super().setup()
+
+            def do_GET(self):
+                self._dispatch(b"")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                self._dispatch(self.rfile.read(length))
+
+            def _dispatch(self, request_body: bytes):
+                route = routes.get(self.path)
+                if route is None:
+                    self.send_error(404)
+                    return
+                status, content_type, body, *extra = route(request_body)
+                headers = extra[0] if extra else {}
+                if not isinstance(body, (str, bytes)):
+                    self._stream(status, content_type, body)
+                    return
+                if isinstance(body, str):
+                    body = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream(self, status: int, content_type: str, chunks):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for chunk in chunks:
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode("utf-8")
+                    self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,270 @@
+"""Voice turn latency offline, and how many calls one process can carry.
+
+Runs voice_bot's pipeline (QueryProcessor, SessionContext, the context
+aggregators, GroqLLMService and TurnTracer) against a real FAISS store
+built from a stub site, with the outside world replaced by local stand-ins:
+
+- a scripted caller takes the place of Daily, Silero and Deepgram: each
+  question is "spoken" at ``--words-per-second`` as interim transcripts, the
+  final transcript follows the last word after ``--stt-latency`` and the VAD
+  stop after ``--vad-stop``;
+- Groq is an OpenAI-compatible stub answering after ``--llm-latency``, with
+  ``--token-latency`` between streamed words;
+- Cloudflare embeddings are a stub answering after ``--embed-latency``;
+- a stub TTS emits audio ``--tts-latency`` after each response's first text.
+
+A turn's latency runs from the VAD stop to the first audio frame reaching
+the output, the tracer's voice_to_voice. For each ``--sessions`` value that
+many calls run concurrently in this process, started over ``--ramp``
+seconds; the per-stage breakdown comes from the tracer's JSONL records. A
+level is sustained while its p95 stays within ``--degradation`` times the
+first level's.
+
+Usage: python -m benchmarks.voice_pipeline --sessions 1 4 16 32 --turns 5
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.chat_load import site_page
+from benchmarks.embedding_throughput import embedding_route
+from benchmarks.stubs import StubServer, chat_completion_route
+from metrics import process_usage
+
+QUESTION = "Can you tell me about product P0-{n}?"
+USER_ID = "caller"
+
+
+def percentiles(values):
+    p95 = statistics.quantiles(values, n=20, method="inclusive")[-1] if len(values) > 1 else values[0]
+    return statistics.median(values), p95
+
+
+async def run_level(sessions: int, args, llm_url: str, trace_path: str, config):
+    # pipecat is imported lazily so that --help works without it
+    from pipecat.frames.frames import (
+        EndFrame,
+        InterimTranscriptionFrame,
+        LLMFullResponseStartFrame,
+        OutputAudioRawFrame,
+        StartFrame,
+        TextFrame,
+        TranscriptionFrame,
+        TTSAudioRawFrame,
+        UserStartedSpeakingFrame,
+        UserStoppedSpeakingFrame,
+    )
+    from pipecat.pipeline.runner import PipelineRunner
+    from pipecat.processors.frame_processor import FrameProcessor
+    from pipecat.services.groq import GroqLLMService
+    from pipecat.utils.time import time_now_iso8601
+
+    from voice_bot import build_pipeline_task
+    from voice_tracing import TurnTracer
+
+    class CallerInput(FrameProcessor):
+        def __init__(self, caller):
+            super().__init__()
+            self.caller = caller
+
+        async def process_frame(self, frame, direction):
+            await super().process_frame(frame, direction)
+            await self.push_frame(frame, direction)
+            if isinstance(frame, StartFrame):
+                self.caller.started.set()
+
+    class CallerOutput(FrameProcessor):
+        def __init__(self, caller):
+            super().__init__()
+            self.caller = caller
+
+        async def process_frame(self, frame, direction):
+            await super().process_frame(frame, direction)
+            if isinstance(frame, (OutputAudioRawFrame, TTSAudioRawFrame)):
+                self.caller.heard_audio()
+                return
+            await self.push_frame(frame, direction)
+
+    class ScriptedCaller:
+        """Transport stand-in: speaks questions as frames and listens for the bot's audio.
+
+        Frames are queued on the pipeline task, so they reach input() in the
+        order DailyTransport with Silero VAD and Deepgram would deliver them;
+        output() notes the first audio after each VAD stop.
+        """
+
+        def __init__(self):
+            self.task = None
+            self.latencies = []
+            self.unanswered = 0
+            self.started = asyncio.Event()
+            self._stopped_at = None
+            self._answered = asyncio.Event()
+            self._input = CallerInput(self)
+            self._output = CallerOutput(self)
+
+        def input(self):
+            return self._input
+
+        def output(self):
+            return self._output
+
+        async def ask(self, question: str) -> None:
+            words = question.split()
+            await self.task.queue_frame(UserStartedSpeakingFrame())
+            for i in range(1, len(words) + 1):
+                await asyncio.sleep(1 / args.words_per_second)
+                await self.task.queue_frame(InterimTranscriptionFrame(" ".join(words[:i]), USER_ID, time_now_iso8601()))
+            # The final transcript and the VAD stop both follow the last word, in either order
+            waited = 0.0
+            for at, event in sorted([(args.stt_latency, "final"), (args.vad_stop, "stop")]):
+                await asyncio.sleep(at - waited)
+                waited = at
+                if event == "final":
+                    await self.task.queue_frame(TranscriptionFrame(question, USER_ID, time_now_iso8601()))
+                else:
+                    self._answered.clear()
+                    self._stopped_at = time.perf_counter()
+                    await self.task.queue_frame(UserStoppedSpeakingFrame())
+            try:
+                await asyncio.wait_for(self._answered.wait(), args.turn_timeout)
+            except asyncio.TimeoutError:
+                self.unanswered += 1
+                self._stopped_at = None
+
+        def heard_audio(self) -> None:
+            if self._stopped_at is not None:
+                self.latencies.append(time.perf_counter() - self._stopped_at)
+                self._stopped_at = None
+                self._answered.set()
+
+    class StubTTS(FrameProcessor):
+        """Answers the first text of each LLM response with an audio frame, tts_latency later."""
+
+        def __init__(self):
+            super().__init__()
+            self._response_started = False
+
+        async def process_frame(self, frame, direction):
+            await super().process_frame(frame, direction)
+            if isinstance(frame, LLMFullResponseStartFrame):
+                self._response_started = True
+            elif isinstance(frame, TextFrame) and self._response_started:
+                self._response_started = False
+                await asyncio.sleep(args.tts_latency)
+                await self.push_frame(TTSAudioRawFrame(audio=bytes(640), sample_rate=16000, num_channels=1))
+            await self.push_frame(frame, direction)
+
+    async def call(number: int):
+        await asyncio.sleep(args.ramp * number / sessions)
+        caller = ScriptedCaller()
+        llm = GroqLLMService(api_key="stub", base_url=llm_url, model="llama-3.1-8b-instant")
+        tracer = TurnTracer(f"benchmark-{sessions}-{number}", path=trace_path, otlp_endpoint=None)
+        task, _ = build_pipeline_task(caller, llm, dict(config), tts=StubTTS(), tracer=tracer)
+        caller.task = task
+        runner = asyncio.create_task(PipelineRunner(handle_sigint=False).run(task))
+        started = asyncio.create_task(caller.started.wait())
+        await asyncio.wait({runner, started}, return_when=asyncio.FIRST_COMPLETED)
+        if runner.done():
+            started.cancel()
+            await runner
+            raise RuntimeError(f"Pipeline of call {number} stopped before it started")
+        for turn in range(args.turns):
+            await caller.ask(QUESTION.format(n=(number * args.turns + turn) % 30))
+            await asyncio.sleep(args.pause)
+        await task.queue_frame(EndFrame())
+        await runner
+        return caller
+
+    return await asyncio.gather(*(call(number) for number in range(sessions)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--turns", type=int, default=5, help="questions asked per call")
+    parser.add_argument("--words-per-second", type=float, default=2.5)
+    parser.add_argument("--stt-latency", type=float, default=0.3, help="last word to final transcript")
+    parser.add_argument("--vad-stop", type=float, default=0.8, help="last word to VAD stop (Silero stop_secs)")
+    parser.add_argument("--embed-latency", type=float, default=0.05)
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="LLM request to first token")
+    parser.add_argument("--token-latency", type=float, default=0.02)
+    parser.add_argument("--tts-latency", type=float, default=0.15, help="first text to first audio")
+    parser.add_argument("--pause", type=float, default=1.5, help="caller's pause after hearing the answer")
+    parser.add_argument("--ramp", type=float, default=2.0, help="seconds over which a level's calls start")
+    parser.add_argument("--turn-timeout", type=float, default=10.0)
+    parser.add_argument("--degradation", type=float, default=1.5, help="p95 growth that counts as degraded")
+    parser.add_argument("--verbose", action="store_true", help="keep the pipeline's logs and prints")
+    args = parser.parse_args()
+
+    answer = " ".join(f"word{i}" for i in range(20))
+    routes = {
+        "/embed": embedding_route(args.embed_latency, 0.0),
+        "/chat/completions": chat_completion_route(args.llm_latency, answer, args.token_latency),
+        "/site/0": lambda body: (200, "text/html", site_page(0)),
+    }
+    with StubServer(routes) as server:
+        workdir = tempfile.mkdtemp(prefix="voice-pipeline-")
+
+        from loguru import logger
+
+        from scrapper.scrapper import Config, EmbeddingService
+        from voice_tracing import summarize
+
+        # voice_bot sets up its own log handler on import, so it is imported before ours replaces it
+        import voice_bot  # noqa: F401
+
+        # Stores and cached embeddings stay out of the checkout and are fresh on every run
+        Config.WEBSITES_DIR = workdir
+        Config.CHUNK_EMBEDDING_DB = os.path.join(workdir, "chunk_embeddings.db")
+        if not args.verbose:
+            logger.remove()
+            # Every runner lists all of pipecat's live tasks when it ends, so other calls' show up as dangling
+            logger.add(sys.stderr, level="WARNING", filter=lambda record: not record["message"].startswith("Dangling tasks"))
+        Config.CLOUDFLARE_API_URL = f"{server.url}/embed"
+        website_id, website_url = 1, f"{server.url}/site/0"
+        config = {"room_url": None, "token": None, "website_id": website_id, "website_url": website_url}
+        embedding_service = EmbeddingService()
+        embedding_service.scrape_website(website_id, website_url)
+        embedding_service.preload(website_id, website_url)
+
+        print(f"{args.turns} turns per call; LLM {args.llm_latency}s, TTS {args.tts_latency}s, "
+              f"embedding {args.embed_latency}s, STT final {args.stt_latency}s, VAD stop {args.vad_stop}s")
+        devnull = open(os.devnull, "w")
+        baseline = None
+        sustained = None
+        for sessions in args.sessions:
+            trace_path = os.path.join(workdir, f"turns-{sessions}.jsonl")
+            quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(devnull)
+            started = time.perf_counter()
+            with quiet:
+                callers = asyncio.run(run_level(sessions, args, server.url, trace_path, config))
+            elapsed = time.perf_counter() - started
+            latencies = [latency for caller in callers for latency in caller.latencies]
+            unanswered = sum(caller.unanswered for caller in callers)
+            if not latencies:
+                print(f"sessions {sessions:>3}: no turn was answered")
+                break
+            p50, p95 = percentiles(latencies)
+            baseline = baseline or p95
+            degraded = unanswered > 0 or p95 > baseline * args.degradation
+            usage = process_usage(os.getpid()) or {}
+            print(f"sessions {sessions:>3}: voice-to-voice p50 {p50 * 1000:7.0f} ms  p95 {p95 * 1000:7.0f} ms  "
+                  f"max {max(latencies) * 1000:7.0f} ms  unanswered {unanswered}  "
+                  f"{elapsed:6.1f}s  rss {usage.get('rss_mb', '?')} MB{'  DEGRADED' if degraded else ''}")
+            for stage, row in summarize(trace_path).items():
+                print(f"    {stage:<20} p50 {row['p50_ms']:8.1f} ms  p95 {row['p95_ms']:8.1f} ms")
+            if degraded:
+                break
+            sustained = sessions
+        if sustained:
+            print(f"sustained {sustained} concurrent sessions within {args.degradation}x of the first level's p95")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from metrics import LatencyHistogram
+
+# Idle, pre-warmed workers kept ready for the next call
+BOT_POOL_SIZE = int(os.getenv("BOT_POOL_SIZE", 2))
+# Upper bound on worker processes, busy or idle; 0 disables the pool
+BOT_POOL_MAX = int(os.getenv("BOT_POOL_MAX", 8))
+# Sessions a worker serves before it is replaced by a fresh process
+BOT_POOL_MAX_SESSIONS = int(os.getenv("BOT_POOL_MAX_SESSIONS", 20))
+# Calls one worker process hosts at once, sharing its models, indexes and HTTP pools
+BOT_WORKER_SESSIONS = int(os.getenv("BOT_WORKER_SESSIONS", 1))
+BOT_POOL_STOP_TIMEOUT = float(os.getenv("BOT_POOL_STOP_TIMEOUT", 10))
+
+
+class PoolExhausted(Exception):
+    """Every worker is full and the pool is at BOT_POOL_MAX."""
+
+
+class BotWorker:
+    """One ``python -m voice_bot --worker`` process.
+
+    The worker loads pipecat, the VAD model and the embedding client once,
+    reports ``ready``, then serves up to ``capacity`` sessions at a time.
+    Messages are JSON lines: commands on the worker's stdin, events on its
+    stdout; both name the room they are about.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, capacity: int = 1):
+        self.id = next(self._ids)
+        self.proc: Optional[asyncio.subprocess.Process] = None
+        self.state = "starting"
+        self.warm = False
+        self.capacity = capacity
+        self.sessions = 0
+        self.spawned_at = time.perf_counter()
+        # Calls in progress by room URL: website_id, joined, requested_at, started_at
+        self.calls: Dict[str, Dict[str, Any]] = {}
+        # The worker's latest report of its memory use, per call included
+        self.usage: Optional[Dict[str, Any]] = None
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.proc.pid if self.proc else None
+
+    def joined(self, room_url: str) -> bool:
+        return self.calls.get(room_url, {}).get("joined", False)
+
+    async def spawn(self, python_path: str, cwd: str, module: str = "voice_bot") -> None:
+        self.proc = await asyncio.create_subprocess_exec(
+            python_path, "-m", module, "--worker", "--sessions", str(self.capacity),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            cwd=cwd,
+        )
+
+    async def send(self, command: str, **fields) -> bool:
+        if self.proc is None or self.proc.stdin is None or self.proc.stdin.is_closing():
+            return False
+        try:
+            self.proc.stdin.write((json.dumps({"command": command, **fields}) + "\n").encode())
+            await self.proc.stdin.drain()
+            return True
+        except (BrokenPipeError, ConnectionResetError):
+            return False
+
+    def describe(self) -> Dict[str, Any]:
+        now = time.perf_counter()
+        return {
+            "id": self.id,
+            "pid": self.pid,
+            "state": self.state,
+            "warm": self.warm,
+            "capacity": self.capacity,
+            "sessions": self.sessions,
+            "calls": [
+                {
+                    "room_url": room_url,
+                    "website_id": call["website_id"],
+                    "joined": call["joined"],
+                    "seconds": round(now - call["started_at"], 1),
+                }
+                for room_url, call in self.calls.items()
+            ],
+            "usage": self.usage,
+            "uptime_seconds": round(now - self.spawned_at, 1),
+        }
+
+
+class BotPool:
+    """Pre-warmed voice bot workers handed a room when a call comes in.
+
+    ``BOT_POOL_SIZE`` idle workers are kept warm, so a call only pays for
+    joining the room. A worker hosts up to ``sessions_per_worker`` calls at
+    once; calls fill workers that already have some before going to an idle
+    one. When none has room, a worker that is still warming up takes the
+    call (its start command waits in the pipe until it is ready), else a new
+    worker is spawned while the pool is under ``max_size``. Workers are
+    replaced after ``max_sessions`` calls to bound leaks; they take no new
+    calls from then on and stop once their last call ends.
+    """
+
+    def __init__(
+        self,
+        min_idle: int = BOT_POOL_SIZE,
+        max_size: int = BOT_POOL_MAX,
+        max_sessions: int = BOT_POOL_MAX_SESSIONS,
+        python_path: Optional[str] = None,
+        cwd: Optional[str] = None,
+        module: str = "voice_bot",
+        sessions_per_worker: int = BOT_WORKER_SESSIONS,
+    ):
+        self.min_idle = min(min_idle, max_size)
+        self.max_size = max_size
+        self.max_sessions = max_sessions
+        self.sessions_per_worker = max(1, sessions_per_worker)
+        self.python_path = python_path or os.getenv("PYTHON_PATH", sys.executable)
+        self.cwd = cwd or os.path.dirname(os.path.abspath(__file__))
+        self.module = module
+        self.workers: List[BotWorker] = []
+        self._tasks = set()
+        self._closing = False
+        # From assigning a room to the bot having joined it
+        self.connect_to_ready = LatencyHistogram()
+        # From spawning a worker to it reporting ready
+        self.warmup = LatencyHistogram()
+        self.counters = {"sessions": 0, "cold_starts": 0, "rejected": 0, "recycled": 0, "crashed": 0}
+        # Awaited with (worker, room_url) when a call ends, including when its worker dies
+        self.on_session_end: Optional[Callable[[BotWorker, str], Awaitable[None]]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    async def start(self) -> None:
+        self._top_up()
+
+    async def assign(self, room_url: str, token: str, website_id: int, website_url: str) -> BotWorker:
+        """Hand a room to a worker without waiting for it to join; raises PoolExhausted."""
+        worker = self._free_worker()
+        if worker is None:
+            self.counters["rejected"] += 1
+            raise PoolExhausted(f"All {self.max_size} voice bot workers are full")
+        if not worker.warm:
+            self.counters["cold_starts"] += 1
+        worker.state = "busy"
+        worker.sessions += 1
+        now = time.perf_counter()
+        worker.calls[room_url] = {"website_id": website_id, "joined": False, "requested_at": now, "started_at": now}
+        self.counters["sessions"] += 1
+        while worker.proc is None and worker.state != "exited":
+            # Spawned a moment ago; the process is still being created
+            await asyncio.sleep(0.01)
+        sent = await worker.send(
+            "start", room_url=room_url, token=token, website_id=website_id, website_url=website_url
+        )
+        if not sent:
+            worker.calls.pop(room_url, None)
+            worker.state = "exited"
+            raise PoolExhausted("Voice bot worker exited before taking the call")
+        self._top_up()
+        return worker
+
+    async def end_session(self, worker: BotWorker, room_url: str) -> bool:
+        """Ask a worker to leave a room; it takes new calls afterwards."""
+        return room_url in worker.calls and await worker.send("end", room_url=room_url)
+
+    async def abandon(self, worker: BotWorker, room_url: str) -> None:
+        """Give up on a call its worker never ended, so the worker gets the slot back."""
+        await self._release(worker, room_url)
+
+    def find(self, room_url: str) -> Optional[BotWorker]:
+        return next((w for w in self.workers if room_url in w.calls), None)
+
+    def stats(self) -> Dict[str, Any]:
+        states = [worker.state for worker in self.workers]
+        return {
+            "min_idle": self.min_idle,
+            "max_size": self.max_size,
+            "max_sessions": self.max_sessions,
+            "sessions_per_worker": self.sessions_per_worker,
+            "workers": len(self.workers),
+            "calls": sum(len(worker.calls) for worker in self.workers),
+            "idle": states.count("idle"),
+            "busy": states.count("busy"),
+            "starting": states.count("starting"),
+            **self.counters,
+            "connect_to_ready": self.connect_to_ready.snapshot(),
+            "warmup": self.warmup.snapshot(),
+            "pool": [worker.describe() for worker in self.workers],
+        }
+
+    async def shutdown(self) -> None:
+        self._closing = True
+        workers = [w for w in self.workers if w.proc is not None]
+        for worker in workers:
+            await worker.send("stop")
+            if worker.proc.stdin:
+                worker.proc.stdin.close()
+        for worker in workers:
+            try:
+                await asyncio.wait_for(worker.proc.wait(), BOT_POOL_STOP_TIMEOUT)
+            except asyncio.TimeoutError:
+                worker.proc.kill()
+                await worker.proc.wait()
+        for task in list(self._tasks):
+            task.cancel()
+        self.workers.clear()
+
+    def _has_room(self, worker: BotWorker) -> bool:
+        return (
+            worker.state in ("idle", "busy", "starting")
+            and len(worker.calls) < worker.capacity
+            and worker.sessions < self.max_sessions
+        )
+
+    def _free_worker(self) -> Optional[BotWorker]:
+        # Pack calls into running workers so idle ones stay free for bursts
+        busy = [w for w in self.workers if w.state == "busy" and self._has_room(w)]
+        if busy:
+            return max(busy, key=lambda w: len(w.calls))
+        for state in ("idle", "starting"):
+            for worker in self.workers:
+                if worker.state == state and self._has_room(worker):
+                    return worker
+        if len(self.workers) < self.max_size:
+            return self._spawn()
+        return None
+
+    def _top_up(self) -> None:
+        if self._closing:
+            return
+        spare = sum(1 for w in self.workers if w.state in ("idle", "starting"))
+        while spare < self.min_idle and len(self.workers) < self.max_size:
+            self._spawn()
+            spare += 1
+
+    def _spawn(self) -> BotWorker:
+        worker = BotWorker(self.sessions_per_worker)
+        self.workers.append(worker)
+        task = asyncio.create_task(self._run(worker))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return worker
+
+    async def _run(self, worker: BotWorker) -> None:
+        try:
+            await worker.spawn(self.python_path, self.cwd, self.module)
+            async for line in worker.proc.stdout:
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue
+                await self._on_event(worker, message)
+            await worker.proc.wait()
+        except Exception as e:
+            print(f"Voice bot worker {worker.id} failed: {e}")
+        finally:
+            if worker.proc is not None and worker.proc.returncode is None:
+                # Its output could no longer be read; a replacement is coming, so this one must not linger
+                try:
+                    worker.proc.kill()
+                except ProcessLookupError:
+                    pass
+                await worker.proc.wait()
+            if worker.calls or not worker.warm:
+                self.counters["crashed"] += 1
+                print(f"Voice bot worker {worker.id} (pid {worker.pid}) exited in state {worker.state} "
+                      f"with {len(worker.calls)} calls")
+            calls, worker.calls = worker.calls, {}
+            worker.state = "exited"
+            for room_url in calls:
+                await self._session_ended(worker, room_url)
+            if worker in self.workers:
+                self.workers.remove(worker)
+            self._top_up()
+
+    async def _on_event(self, worker: BotWorker, message: Dict[str, Any]) -> None:
+        event = message.get("event")
+        if event == "ready":
+            worker.warm = True
+            self.warmup.observe(time.perf_counter() - worker.spawned_at)
+            if worker.state == "starting":
+                worker.state = "idle"
+        elif event == "joined":
+            worker.usage = message.get("usage", worker.usage)
+            call = worker.calls.get(message.get("room_url"))
+            if call is not None:
+                call["joined"] = True
+                if call["requested_at"] is not None:
+                    self.connect_to_ready.observe(time.perf_counter() - call["requested_at"])
+                    call["requested_at"] = None
+        elif event == "ended":
+            worker.usage = message.get("usage", worker.usage)
+            room_url = message.get("room_url")
+            if await self._release(worker, room_url):
+                await self._session_ended(worker, room_url)
+        elif event == "error":
+            print(f"Voice bot worker {worker.id} ({message.get('room_url')}): {message.get('error')}")
+
+    async def _release(self, worker: BotWorker, room_url: str) -> bool:
+        """Free a call's slot; an emptied worker goes idle, or stops once it has served max_sessions."""
+        if worker.calls.pop(room_url, None) is None:
+            return False
+        if not worker.calls and worker.state == "busy":
+            if worker.sessions >= self.max_sessions:
+                self.counters["recycled"] += 1
+                worker.state = "stopping"
+                await worker.send("stop")
+                self._top_up()
+            else:
+                worker.state = "idle"
+        return True
+
+    async def _session_ended(self, worker: BotWorker, room_url: str) -> None:
+        if self.on_session_end is None:
+            return
+        try:
+            await self.on_session_end(worker, room_url)
+        except Exception as e:
+            print(f"Failed to clean up after call in {room_url}: {e}")
@@ -0,0 +1,212 @@
+import asyncio
+import itertools
+import os
+import subprocess
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from bot_pool import BotPool, BotWorker, PoolExhausted
+from metrics import process_usage
+
+# Calls served at once, across pool workers and one-off bot processes
+BOT_MAX_SESSIONS = int(os.getenv("BOT_MAX_SESSIONS", 8))
+# Longest a call may last before its bot is stopped and its room deleted
+BOT_SESSION_TIMEOUT = float(os.getenv("BOT_SESSION_TIMEOUT", 30 * 60))
+BOT_REAP_INTERVAL = float(os.getenv("BOT_REAP_INTERVAL", 5))
+# Grace period between asking a bot to stop and killing it
+BOT_STOP_GRACE = float(os.getenv("BOT_STOP_GRACE", 10))
+
+
+class BotSession:
+    """One call: the room, and the pool worker or process running its bot."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, room_url: str, website_id: int, worker: Optional[BotWorker] = None,
+                 proc: Optional[subprocess.Popen] = None):
+        self.id = next(self._ids)
+        self.room_url = room_url
+        self.website_id = website_id
+        self.worker = worker
+        self.proc = proc
+        self.state = "running"
+        self.started_at = time.time()
+        self.stop_requested_at: Optional[float] = None
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.worker.pid if self.worker else self.proc.pid
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "room_url": self.room_url,
+            "website_id": self.website_id,
+            "kind": "pool" if self.worker else "process",
+            "pid": self.pid,
+            "state": self.state,
+            "joined": self.worker.joined(self.room_url) if self.worker else None,
+            # Usage is of the whole process, shared by this many calls
+            "process_calls": len(self.worker.calls) if self.worker else 1,
+            "seconds": round(time.time() - self.started_at, 1),
+            "usage": process_usage(self.pid),
+        }
+
+
+class BotSupervisor:
+    """Tracks every live call and cleans up after it.
+
+    Calls go to the worker pool when it is enabled, else to a bot process of
+    their own. A periodic pass reaps exited processes, stops bots that ran
+    past ``session_timeout`` (killing them if they ignore the request for
+    ``stop_grace``), and deletes the room of every call that ended. At most
+    ``max_sessions`` calls run at once.
+    """
+
+    def __init__(
+        self,
+        pool: BotPool,
+        delete_room: Optional[Callable[[str], Awaitable[Any]]] = None,
+        max_sessions: int = BOT_MAX_SESSIONS,
+        session_timeout: float = BOT_SESSION_TIMEOUT,
+        reap_interval: float = BOT_REAP_INTERVAL,
+        stop_grace: float = BOT_STOP_GRACE,
+    ):
+        self.pool = pool
+        self.delete_room = delete_room
+        self.max_sessions = max_sessions
+        self.session_timeout = session_timeout
+        self.reap_interval = reap_interval
+        self.stop_grace = stop_grace
+        self.sessions: Dict[str, BotSession] = {}
+        self.counters = {"started": 0, "ended": 0, "timed_out": 0, "killed": 0, "rejected": 0, "abandoned": 0, "rooms_deleted": 0}
+        self._watcher: Optional[asyncio.Task] = None
+        self._cleanups = set()
+        pool.on_session_end = self._on_pool_session_end
+
+    def at_capacity(self) -> bool:
+        return len(self.sessions) >= self.max_sessions
+
+    async def start(self) -> None:
+        if self.pool.enabled:
+            await self.pool.start()
+        self._watcher = asyncio.create_task(self._watch())
+
+    async def start_session(self, room_url: str, token: str, website_id: int, website_url: str) -> BotSession:
+        """Start a bot for a call; raises PoolExhausted, or OSError if the process cannot start."""
+        if len(self.sessions) >= self.max_sessions:
+            # Another call took the last slot while this one's room was being created
+            raise PoolExhausted(f"All {self.max_sessions} voice bots are busy")
+        if self.pool.enabled:
+            worker = await self.pool.assign(room_url, token, website_id, website_url)
+            session = BotSession(room_url, website_id, worker=worker)
+        else:
+            python_path = os.getenv("PYTHON_PATH", "python3")
+            proc = subprocess.Popen(
+                [python_path, "-m", self.pool.module, "-u", room_url, "-t", token, "-l", website_url, "-i", str(website_id)],
+                bufsize=1,
+                cwd=self.pool.cwd,
+            )
+            session = BotSession(room_url, website_id, proc=proc)
+        self.sessions[room_url] = session
+        self.counters["started"] += 1
+        return session
+
+    async def reap(self) -> None:
+        """One supervision pass: collect exited bots and stop the ones past their time limit."""
+        now = time.time()
+        for session in list(self.sessions.values()):
+            if session.proc is not None and session.proc.poll() is not None:
+                await self._finish(session)
+                continue
+            if session.stop_requested_at is None:
+                if now - session.started_at > self.session_timeout:
+                    print(f"Call in {session.room_url} passed {self.session_timeout:.0f}s, stopping its bot")
+                    self.counters["timed_out"] += 1
+                    await self._stop(session)
+            elif now - session.stop_requested_at > self.stop_grace and session.state != "killed":
+                if session.worker is not None and len(session.worker.calls) > 1:
+                    # Killing the worker would drop its other calls; deleting the room ejects the bot
+                    print(f"Bot in {session.room_url} ignored the stop request, giving up on it")
+                    self.counters["abandoned"] += 1
+                    await self.pool.abandon(session.worker, session.room_url)
+                    await self._finish(session)
+                    continue
+                proc = session.proc or session.worker.proc
+                if proc is not None:
+                    proc.kill()
+                session.state = "killed"
+                self.counters["killed"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        sessions = [session.describe() for session in self.sessions.values()]
+        states: Dict[str, int] = {}
+        for session in sessions:
+            states[session["state"]] = states.get(session["state"], 0) + 1
+        return {
+            "max_sessions": self.max_sessions,
+            "session_timeout": self.session_timeout,
+            "active": len(sessions),
+            "states": states,
+            **self.counters,
+            # Pool workers may host several calls; count each process once
+            "rss_mb": round(sum({s["pid"]: s["usage"]["rss_mb"] for s in sessions if s["usage"]}.values()), 1),
+            "sessions": sessions,
+        }
+
+    async def shutdown(self) -> None:
+        if self._watcher:
+            self._watcher.cancel()
+        for session in list(self.sessions.values()):
+            if session.proc is not None and session.proc.poll() is None:
+                session.proc.terminate()
+        await self.pool.shutdown()
+        for session in list(self.sessions.values()):
+            if session.proc is not None:
+                try:
+                    await asyncio.to_thread(session.proc.wait, self.stop_grace)
+                except subprocess.TimeoutExpired:
+                    session.proc.kill()
+            await self._finish(session)
+        if self._cleanups:
+            await asyncio.gather(*self._cleanups, return_exceptions=True)
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            try:
+                await self.reap()
+            except Exception as e:
+                print(f"Bot supervisor pass failed: {e}")
+
+    async def _stop(self, session: BotSession) -> None:
+        session.state = "stopping"
+        session.stop_requested_at = time.time()
+        if session.worker is not None:
+            if not await self.pool.end_session(session.worker, session.room_url):
+                # The worker already moved on; nothing will report this call's end
+                await self._finish(session)
+        else:
+            session.proc.terminate()
+
+    async def _finish(self, session: BotSession) -> None:
+        if self.sessions.pop(session.room_url, None) is None:
+            return
+        session.state = "exited"
+        self.counters["ended"] += 1
+        if self.delete_room is not None:
+            task = asyncio.create_task(self._delete_room(session.room_url))
+            self._cleanups.add(task)
+            task.add_done_callback(self._cleanups.discard)
+
+    async def _delete_room(self, room_url: str) -> None:
+        try:
+            await self.delete_room(room_url)
+            self.counters["rooms_deleted"] += 1
+        except Exception as e:
+            print(f"Failed to delete room {room_url}: {e}")
+
+    async def _on_pool_session_end(self, worker: BotWorker, room_url: str) -> None:
+        session = self.sessions.get(room_url)
+        if session is not None and session.worker is worker:
+            await self._finish(session)
@@ -15,6 +15,8 @@ if not os.path.exists("main.db"):
 def set_sqlite_pragma(dbapi_connection, connection_record):
     cursor = dbapi_connection.cursor()
     cursor.execute("PRAGMA foreign_keys=ON")
+    # Readers no longer wait on writers when handlers hit the DB from several threads
+    cursor.execute("PRAGMA journal_mode=WAL")
     cursor.close()
 
 # Create engine with specific configurations
@@ -1,7 +1,25 @@
-from typing import List, Any
+from typing import List, Any, Callable
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import json
+import os
 from crud import DatabaseHelper
 import models 
 
+# Bounded pool for sync work (SQLite, file I/O) called from async handlers, so a
+# burst of requests queues here instead of starving the default executor
+BLOCKING_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("BLOCKING_WORKERS", 16)), thread_name_prefix="blocking"
+)
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """
+    Run a blocking call on the bounded executor without blocking the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(BLOCKING_EXECUTOR, functools.partial(func, *args, **kwargs))
+
 def orm_to_dict(obj: Any) -> dict:
     """
     Convert a single SQLAlchemy ORM object to a dictionary.
@@ -28,6 +46,12 @@ def reformat_date(items, column):
             setattr(item, column, value.strftime("%Y-%m-%d %H:%M:%S"))
     return items
 
+def sse_event(event: str, data: Any) -> str:
+    """
+    Format one server-sent event with a JSON payload.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 def run_scrapper(website_id: int, url: str):
     db = DatabaseHelper()
     website = db.get_single(models.Website, website_id)
@@ -36,5 +60,11 @@ def run_scrapper(website_id: int, url: str):
     service = EmbeddingService()
     website_id = website_id
     url = url
-    success = service.scrape_website(website_id, url)
-    db.update(models.Website, website_id, {"status":1})
\ No newline at end of file
+    success = service.scrape_website(website_id, url, website.sublinks if website else 0)
+    db.update(models.Website, website_id, {"status":1})
+
+def run_document_ingest(website_id: int, url: str, directory: str = None):
+    from scrapper.scrapper import Config, EmbeddingService
+    #index new and changed local files into the website's store
+    service = EmbeddingService()
+    return service.ingest_documents(website_id, url, directory or Config.DOCUMENTS_DIR)
@@ -0,0 +1,34 @@
+"""Index local files into a website's store.
+
+Only files that are new or changed since the last run are read and embedded;
+unchanged files are skipped on their mtime and size, or on their content hash
+if they were only touched. Queries never read the documents directory.
+
+Usage: python ingest_documents.py <website_id> [--dir documents]
+"""
+import argparse
+import json
+
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("website_id", type=int)
+    parser.add_argument("--dir", default=None, help="documents directory (default: Config.DOCUMENTS_DIR)")
+    args = parser.parse_args()
+
+    from crud import DatabaseHelper
+    import models
+    from scrapper.scrapper import Config, EmbeddingService
+
+    website = DatabaseHelper().get_single(models.Website, args.website_id)
+    url = website.url if website else None
+    stats = EmbeddingService().ingest_documents(args.website_id, url, args.dir or Config.DOCUMENTS_DIR)
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,237 @@
 from dotenv import load_dotenv
+import asyncio
+from contextlib import asynccontextmanager
+import httpx
 import openai
 import os
+import random
+import threading
+import time
+import weakref
+
+from metrics import LatencyHistogram
 
 load_dotenv(override=True)
+
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
+# Seconds to wait for a connection, and for any single read (for streams: between chunks)
+GROQ_CONNECT_TIMEOUT = float(os.getenv("GROQ_CONNECT_TIMEOUT", 5))
+GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", 30))
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", 3))
+GROQ_RETRY_BASE_DELAY = float(os.getenv("GROQ_RETRY_BASE_DELAY", 0.5))
+GROQ_RETRY_MAX_DELAY = float(os.getenv("GROQ_RETRY_MAX_DELAY", 8))
+# Requests in flight per process; keeps bursts under the provider's rate limits
+GROQ_MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", 16))
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", 32))
+SYSTEM_PROMPT = "You are a helpful assistant, only provide information provided in context, if query is not readable or understandable, say you don't know about this query."
+
+RETRYABLE_ERRORS = (
+    openai.APIConnectionError,  # includes APITimeoutError
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class LLMClient:
+    """Long-lived, pooled client for the OpenAI-compatible Groq API.
+
+    One AsyncOpenAI client (and its keep-alive connection pool) serves every
+    request on the running event loop. Calls are limited to
+    ``max_concurrency`` at a time, retried with full-jitter exponential
+    backoff on connection errors, timeouts, 429s and 5xx, and their latency is
+    recorded in histograms: total time per completion and, for streams, time
+    to first token.
+    """
+
+    def __init__(
+        self,
+        base_url: str = GROQ_BASE_URL,
+        api_key: str = None,
+        connect_timeout: float = GROQ_CONNECT_TIMEOUT,
+        timeout: float = GROQ_TIMEOUT,
+        max_retries: int = GROQ_MAX_RETRIES,
+        max_concurrency: int = GROQ_MAX_CONCURRENCY,
+        max_connections: int = GROQ_MAX_CONNECTIONS,
+    ):
+        self.base_url = base_url
+        self.api_key = api_key or os.getenv("GROQ_API_KEY")
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.latency = LatencyHistogram()
+        self.first_token = LatencyHistogram()
+        self.queue_wait = LatencyHistogram()
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.in_flight = 0
+        # Clients and limiters are bound to the loop that created them, so each loop gets its own
+        self._async_state = weakref.WeakKeyDictionary()
+        self._async_state_lock = threading.Lock()
+        self._sync_client = None
+        self._sync_lock = threading.Lock()
+
+    def _get_client(self) -> tuple[openai.AsyncOpenAI, asyncio.Semaphore]:
+        """Return the pooled client and request limit of the running event loop, creating them on first use."""
+        loop = asyncio.get_running_loop()
+        with self._async_state_lock:
+            state = self._async_state.get(loop)
+            if state is None or state[0].is_closed():
+                state = self._async_state[loop] = (
+                    openai.AsyncOpenAI(
+                        api_key=self.api_key,
+                        base_url=self.base_url,
+                        # Retries happen here, with jitter and under the limiter
+                        max_retries=0,
+                        http_client=httpx.AsyncClient(limits=self.limits, timeout=self.timeout),
+                    ),
+                    asyncio.Semaphore(self.max_concurrency),
+                )
+            return state
+
+    def sync_client(self) -> openai.OpenAI:
+        """Shared blocking client for code that cannot await; uses the SDK's own retries."""
+        with self._sync_lock:
+            if self._sync_client is None:
+                self._sync_client = openai.OpenAI(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    max_retries=self.max_retries,
+                    http_client=httpx.Client(limits=self.limits, timeout=self.timeout),
+                )
+            return self._sync_client
+
+    async def complete(self, messages, **kwargs) -> str:
+        started = time.perf_counter()
+        client, semaphore = self._get_client()
+        async with self._slot(semaphore):
+            response = await self._create(client, messages=messages, **kwargs)
+        self.latency.observe(time.perf_counter() - started)
+        return response.choices[0].message.content
+
+    async def stream(self, messages, **kwargs):
+        """Yield the completion's text as it arrives; only opening the stream is retried."""
+        started = time.perf_counter()
+        client, semaphore = self._get_client()
+        first = True
+        async with self._slot(semaphore):
+            stream = await self._create(client, messages=messages, stream=True, **kwargs)
+            try:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        if first:
+                            self.first_token.observe(time.perf_counter() - started)
+                            first = False
+                        yield chunk.choices[0].delta.content
+            finally:
+                # A consumer that stops early (e.g. a disconnected SSE client) must not leave the connection busy
+                await stream.close()
+        self.latency.observe(time.perf_counter() - started)
+
+    @asynccontextmanager
+    async def _slot(self, semaphore: asyncio.Semaphore):
+        waited = time.perf_counter()
+        async with semaphore:
+            self.queue_wait.observe(time.perf_counter() - waited)
+            self.in_flight += 1
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+
+    async def _create(self, client: openai.AsyncOpenAI, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            self.requests += 1
+            try:
+                return await client.chat.completions.create(**kwargs)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    self.errors += 1
+                    raise
+                self.retries += 1
+                delay = self._retry_delay(attempt, e)
+                print(f"LLM retry {attempt + 1}/{self.max_retries} in {delay:.2f}s after error: {e}")
+                await asyncio.sleep(delay)
+            except openai.OpenAIError:
+                self.errors += 1
+                raise
+
+    @staticmethod
+    def _retry_delay(attempt: int, error: Exception) -> float:
+        # Full jitter, so clients that failed together do not retry together
+        delay = random.uniform(0, min(GROQ_RETRY_MAX_DELAY, GROQ_RETRY_BASE_DELAY * 2 ** attempt))
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        try:
+            return max(delay, min(GROQ_RETRY_MAX_DELAY, float(retry_after)))
+        except (TypeError, ValueError):
+            return delay
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "latency": self.latency.snapshot(),
+            "first_token": self.first_token.snapshot(),
+            "queue_wait": self.queue_wait.snapshot(),
+        }
+
+    async def aclose(self):
+        """Close the running event loop's client; other loops' clients stay open."""
+        with self._async_state_lock:
+            state = self._async_state.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state[0].close()
+
+
+# Shared by every GroqService in the process
+LLM_CLIENT = LLMClient()
+
 class GroqService:
-    def ask_ai(self, vector):
-
-        prompt = ""
-        if len(vector) == 0:
-            prompt = "No context found, you simply say you don't know"
-        else:
-            prompt = vector[0]
-            
-        client = openai.OpenAI(
-            api_key=os.getenv("GROQ_API_KEY"),
-            base_url="https://api.groq.com/openai/v1" 
+    def __init__(self, client: LLMClient = None):
+        self.client = client or LLM_CLIENT
+
+    def build_prompt(self, query, results):
+        """User prompt from ranked search results, trimmed to the context token budget."""
+        if not results:
+            return "No context found, you simply say you don't know"
+        # Imported here: the scrapper pulls in faiss and llama_index, which callers of the client alone do not need
+        from scrapper.scrapper import assemble_context
+
+        context = assemble_context(results)
+        return (
+            "Context information is below.\n"
+            "---------------------\n"
+            f"{context}\n"
+            "---------------------\n"
+            "Given the context information and not prior knowledge, answer the query.\n"
+            f"Query: {query}\n"
+            "Answer: "
         )
-        
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "system", "content": "You are a helpful assistant, only provide information provided in context, if query is not readable or understandable, say you don't know about this query."},{"role": "user", "content": prompt}],
+
+    def messages(self, prompt):
+        return [{"role": "system", "content": SYSTEM_PROMPT},{"role": "user", "content": prompt}]
+
+    def ask_ai(self, prompt):
+        started = time.perf_counter()
+        response = self.client.sync_client().chat.completions.create(
+            model=GROQ_MODEL,
+            messages=self.messages(prompt),
             temperature=0.7
         )
+        self.client.latency.observe(time.perf_counter() - started)
         return response.choices[0].message.content
-        
 
-    
\ No newline at end of file
+    async def aask_ai(self, prompt):
+        """Async variant of ask_ai for request handlers; waiting on Groq does not block the event loop."""
+        return await self.client.complete(self.messages(prompt), model=GROQ_MODEL, temperature=0.7)
+
+    async def astream_ai(self, prompt):
+        """Yield the answer's text as Groq generates it."""
+        async for text in self.client.stream(self.messages(prompt), model=GROQ_MODEL, temperature=0.7):
+            yield text
@@ -0,0 +1,88 @@
+import bisect
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+# Upper bounds in milliseconds; the last bucket catches everything slower
+DEFAULT_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram, cheap enough to record on every request.
+
+    Percentiles are estimated by interpolating inside the bucket that holds
+    them, so they are only as fine as the bucket bounds.
+    """
+
+    def __init__(self, buckets_ms=DEFAULT_BUCKETS_MS):
+        self.bounds = list(buckets_ms)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        ms = seconds * 1000
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+            self.count += 1
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Estimated q-th percentile (0-100) in milliseconds, or None if empty."""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = q / 100 * self.count
+            seen = 0
+            for i, count in enumerate(self.counts):
+                if count and seen + count >= rank:
+                    lower = self.bounds[i - 1] if i else 0.0
+                    upper = min(self.bounds[i], self.max_ms) if i < len(self.bounds) else self.max_ms
+                    lower = min(lower, upper)
+                    return lower + (upper - lower) * (rank - seen) / count
+                seen += count
+            return self.max_ms
+
+    def snapshot(self) -> Dict:
+        labels: List[str] = [f"le_{bound}ms" for bound in self.bounds] + ["inf"]
+        with self._lock:
+            buckets = dict(zip(labels, self.counts))
+            count, total_ms, max_ms = self.count, self.total_ms, self.max_ms
+        return {
+            "count": count,
+            "mean_ms": round(total_ms / count, 1) if count else None,
+            "p50_ms": _round(self.percentile(50)),
+            "p95_ms": _round(self.percentile(95)),
+            "p99_ms": _round(self.percentile(99)),
+            "max_ms": round(max_ms, 1),
+            "buckets": buckets,
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 1)
+
+
+def process_usage(pid: Optional[int]) -> Optional[Dict[str, Any]]:
+    """CPU time, resident memory and thread count of a process from /proc, or None if unavailable."""
+    if not pid:
+        return None
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            # The command name may contain spaces; fields after it are fixed
+            fields = f.read().rsplit(")", 1)[1].split()
+    except (OSError, IndexError):
+        return None
+    # Fields 14, 15, 20 and 24 of stat, counted from the state field (3)
+    utime, stime, threads, rss_pages = int(fields[11]), int(fields[12]), int(fields[17]), int(fields[21])
+    return {
+        "cpu_seconds": round((utime + stime) / _CLOCK_TICKS, 2),
+        "rss_mb": round(rss_pages * _PAGE_SIZE / (1024 * 1024), 1),
+        "threads": threads,
+    }
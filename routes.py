@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Request, BackgroundTasks
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from database import SessionLocal
 import models 
@@ -7,6 +7,7 @@ from fastapi.responses import JSONResponse
 from helpers import *
 from fastapi.encoders import jsonable_encoder
 from typing import Generator
+import time
 from crud import DatabaseHelper
 
 db = DatabaseHelper()
@@ -20,42 +21,62 @@ templates = Jinja2Templates(directory="templates")
 @router.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
     data = {}
-    data['urls'] = db.get_all(models.Website,filters={},order_by='-id')
+    data['urls'] = await run_blocking(db.get_all, models.Website,filters={},order_by='-id')
     return templates.TemplateResponse("index.html", {"request": request, "data": data})
 
 @router.get("/website", response_class=HTMLResponse)
 async def get_websites(request: Request):
     data         = {}
-    urls = db.get_all(models.Website,filters={},order_by='-id')
+    urls = await run_blocking(db.get_all, models.Website,filters={},order_by='-id')
     data['urls'] = (urls)
     return JSONResponse(jsonable_encoder(data))
 
 @router.get("/chat/{id}", response_class=HTMLResponse)
 async def read_chat(request: Request, id: int):
     data = {}
-    data['chats'] = db.get_all(models.Chat,filters={"website_id":id},order_by='id')
+    data['chats'] = await run_blocking(db.get_all, models.Chat,filters={"website_id":id},order_by='id')
     data['id']    = id
-    data['website'] = db.get_single(models.Website,id)
+    data['website'] = await run_blocking(db.get_single, models.Website,id)
     return templates.TemplateResponse("chat.html", {"request": request, "data": data})
 
 @router.get("/voice/{id}", response_class=HTMLResponse)
 async def voice_chat(request: Request, id: int):
     data = {}
-    data['chats'] = db.get_all(models.Chat,filters={"website_id":id},order_by='id')
+    data['chats'] = await run_blocking(db.get_all, models.Chat,filters={"website_id":id},order_by='id')
     data['id']    = id
-    data['website'] = db.get_single(models.Website,id)
+    data['website'] = await run_blocking(db.get_single, models.Website,id)
     return templates.TemplateResponse("voice.html", {"request": request, "data": data})
 
 @router.get("/website/delete/{id}", response_class=HTMLResponse)
 async def delete_website(request: Request, id: int):
-    db.delete(models.Website,id)
-    db.delete_all(models.Chat,filters={"website_id":id})
+    from scrapper.scrapper import ANSWER_CACHE, INDEX_CACHE
+
+    await run_blocking(db.delete, models.Website,id)
+    await run_blocking(db.delete_all, models.Chat,filters={"website_id":id})
+    INDEX_CACHE.invalidate(str(id))
+    ANSWER_CACHE.invalidate(id)
     rsp["status"] = True
     rsp["message"] = "Website deleted successfully"
     rsp["data"] = []
     
     return JSONResponse(jsonable_encoder(rsp))
 
+@router.get("/cache/stats")
+async def cache_stats(request: Request):
+    from scrapper.scrapper import ANSWER_CACHE, INDEX_CACHE, QUERY_EMBEDDING_CACHE
+
+    data = {}
+    data['index_cache'] = INDEX_CACHE.stats()
+    data['query_embedding_cache'] = QUERY_EMBEDDING_CACHE.stats()
+    data['answer_cache'] = ANSWER_CACHE.stats()
+    return JSONResponse(jsonable_encoder(data))
+
+@router.get("/llm/stats")
+async def llm_stats(request: Request):
+    from llm import LLM_CLIENT
+
+    return JSONResponse(jsonable_encoder(LLM_CLIENT.stats()))
+
 
 
 ## POST Routes ##
@@ -64,14 +85,14 @@ async def create_website(request: Request, background_tasks: BackgroundTasks):
     data = await request.form()
     url = data.get("url")
     sublinks = data.get("sublinks")
-    existing_url = db.get_all(models.Website,filters={"url":url},order_by='-id')
+    existing_url = await run_blocking(db.get_all, models.Website,filters={"url":url},order_by='-id')
     if existing_url:
         
         rsp["status"]  = False
         rsp["message"] = "URL already exists!"
         return rsp
     else:
-        new_item = db.create(models.Website, {
+        new_item = await run_blocking(db.create, models.Website, {
             'url': url,
             'sublinks': sublinks
         })
@@ -89,14 +110,43 @@ async def update_website(request: Request):
     url = data.get("url")
     sublinks = data.get("sublinks")
     
-    db.update(models.Website, id, {
+    await run_blocking(db.update, models.Website, id, {
         'url': url,
         'sublinks': sublinks
     })
     
     rsp["status"]  = True
     rsp["message"] = "Website updated successfully"
-    
+
+    return JSONResponse(jsonable_encoder(rsp))
+
+@router.post("/website/rescrape/{id}")
+async def rescrape_website(request: Request, id: int, background_tasks: BackgroundTasks):
+    website = await run_blocking(db.get_single, models.Website, id)
+    if not website:
+        rsp["status"]  = False
+        rsp["message"] = "Website not found"
+        return JSONResponse(jsonable_encoder(rsp))
+
+    await run_blocking(db.update, models.Website, id, {"status": 0})
+    background_tasks.add_task(run_scrapper, website.id, website.url)
+
+    rsp["status"]  = True
+    rsp["message"] = "Website is being prosessed"
+    return JSONResponse(jsonable_encoder(rsp))
+
+@router.post("/website/documents/{id}")
+async def ingest_documents(request: Request, id: int, background_tasks: BackgroundTasks):
+    website = await run_blocking(db.get_single, models.Website, id)
+    if not website:
+        rsp["status"]  = False
+        rsp["message"] = "Website not found"
+        return JSONResponse(jsonable_encoder(rsp))
+
+    background_tasks.add_task(run_document_ingest, website.id, website.url)
+
+    rsp["status"]  = True
+    rsp["message"] = "Documents are being processed"
     return JSONResponse(jsonable_encoder(rsp))
 @router.post("/chat/ask")
 async def ask_ai(request: Request):
@@ -104,34 +154,120 @@ async def ask_ai(request: Request):
     query  = data.get("query")
     website_id = int(data.get("id"))
     
-    website = db.get_single(models.Website,website_id)
-    chat_item = db.create(models.Chat, {
+    website = await run_blocking(db.get_single, models.Website,website_id)
+    chat_item = await run_blocking(db.create, models.Chat, {
         'query': query,
         'website_id': website_id,
     })
 
     
-    from scrapper.scrapper import EmbeddingService
+    from scrapper.scrapper import ANSWER_CACHE, EmbeddingService
     from llm import GroqService
     
     service = EmbeddingService()
     llm = GroqService()
     
-    vector_result = service.query(website_id,website.url,query)
-    response = llm.ask_ai(vector_result)
+    embedding = await service.aquery_embedding(query)
+    version = await run_blocking(service.index_version, website_id)
+    cached = ANSWER_CACHE.get(website_id, query, embedding, version) if embedding else None
+    if cached:
+        # The prompt this question would have been answered with, for the Chat row
+        response, prompt = cached.answer, llm.build_prompt(query, cached.results)
+    else:
+        results = await service.aquery(website_id,website.url,query) or []
+        prompt = llm.build_prompt(query, results)
+        response = await llm.aask_ai(prompt)
+        if embedding:
+            ANSWER_CACHE.put(website_id, query, embedding, response, results, version)
     
-    chat_item2 = db.create(models.Chat, {
+    chat_item2 = await run_blocking(db.create, models.Chat, {
         'response': response,
         'website_id': website_id,
         'query': query,
-        'prompt': vector_result[0],
+        'prompt': prompt,
         'sent': 1
     })
     
     return {"status": True, "message": "Operation successful", "data": response}
+
+@router.post("/chat/ask/stream")
+async def ask_ai_stream(request: Request):
+    """Like /chat/ask, but streams the answer as server-sent events.
+
+    Emits a "token" event per chunk of text, then "done" with the full
+    response and timings (time to first token and total, both measured from
+    the start of the request). The Chat row is saved once the answer is complete.
+    A cached answer to a near-duplicate question arrives as a single token.
+    """
+    started = time.perf_counter()
+    data = await request.form()
+    query  = data.get("query")
+    website_id = int(data.get("id"))
     
+    website = await run_blocking(db.get_single, models.Website,website_id)
+    await run_blocking(db.create, models.Chat, {
+        'query': query,
+        'website_id': website_id,
+    })
+
+    from scrapper.scrapper import ANSWER_CACHE, EmbeddingService
+    from llm import GroqService
     
+    service = EmbeddingService()
+    llm = GroqService()
     
-    
-    
-    
\ No newline at end of file
+    embedding = await service.aquery_embedding(query)
+    version = await run_blocking(service.index_version, website_id)
+    cached = ANSWER_CACHE.get(website_id, query, embedding, version) if embedding else None
+    if cached:
+        results = cached.results
+    else:
+        results = await service.aquery(website_id,website.url,query) or []
+    prompt = llm.build_prompt(query, results)
+
+    async def answer():
+        if cached:
+            yield cached.answer
+        else:
+            async for text in llm.astream_ai(prompt):
+                yield text
+
+    async def events():
+        parts = []
+        first_token_at = None
+        try:
+            async for text in answer():
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                parts.append(text)
+                yield sse_event("token", {"text": text})
+        except Exception as e:
+            print(f"Streaming error for website {website_id}: {e}")
+            yield sse_event("error", {"message": "Failed to generate a response"})
+            return
+
+        response = "".join(parts)
+        if embedding and not cached:
+            ANSWER_CACHE.put(website_id, query, embedding, response, results, version)
+        await run_blocking(db.create, models.Chat, {
+            'response': response,
+            'website_id': website_id,
+            'query': query,
+            'prompt': prompt,
+            'sent': 1
+        })
+        finished_at = time.perf_counter()
+        timings = {
+            "ttft_ms": round(((first_token_at or finished_at) - started) * 1000),
+            "total_ms": round((finished_at - started) * 1000),
+            "cached": cached is not None,
+        }
+        print(f"Chat stream for website {website_id}: {timings}")
+        yield sse_event("done", {"response": response, **timings})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # no-transform/X-Accel-Buffering keep proxies from holding tokens back
+        headers={"Cache-Control": "no-cache, no-transform", "X-Accel-Buffering": "no"},
+    )
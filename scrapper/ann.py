@@ -0,0 +1,111 @@
+import math
+from typing import Optional
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq")
+STORAGE_MODES = ("float32", "float16", "pq")
+METRICS = {"l2": faiss.METRIC_L2, "cosine": faiss.METRIC_INNER_PRODUCT}
+# 8-bit PQ trains 256 centroids per subquantizer, and faiss wants 39 points for each;
+# with fewer bits recall collapses, so smaller corpora are stored as float16 instead
+PQ_MIN_VECTORS = 39 * 256
+
+
+def choose_index_type(n_vectors: int, flat_max: int, hnsw_max: int) -> str:
+    """Pick an index type from corpus size: exact scan while it is cheap, ANN beyond."""
+    if n_vectors <= flat_max:
+        return "flat"
+    if n_vectors <= hnsw_max:
+        return "hnsw"
+    return "ivf_pq"
+
+
+def ivf_nlist(n_vectors: int) -> int:
+    """Number of IVF lists: ~4*sqrt(n), keeping at least 39 training points per list."""
+    return max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // 39))
+
+
+def pq_subquantizers(dimension: int, target: int = 64) -> int:
+    """Largest divisor of dimension not above target, so PQ splits vectors evenly."""
+    for m in range(min(target, dimension), 0, -1):
+        if dimension % m == 0:
+            return m
+    return 1
+
+
+def storage_for(storage: str, n_vectors: int) -> str:
+    """Vector storage actually built: pq falls back to float16 below PQ_MIN_VECTORS."""
+    if storage not in STORAGE_MODES:
+        raise ValueError(f"Unknown vector storage: {storage} (expected one of {', '.join(STORAGE_MODES)})")
+    if storage == "pq" and n_vectors < PQ_MIN_VECTORS:
+        return "float16"
+    return storage
+
+
+def factory_string(index_type: str, n_vectors: int, dimension: int, hnsw_m: int = 32, storage: str = "float32") -> str:
+    """faiss.index_factory description for an index type and vector storage sized for n_vectors."""
+    if index_type == "ivf_pq":
+        storage = "pq"
+    storage = storage_for(storage, n_vectors)
+    codec = {"float32": "Flat", "float16": "SQfp16", "pq": f"PQ{pq_subquantizers(dimension)}x8"}[storage]
+    if index_type == "flat":
+        return codec
+    if index_type == "hnsw":
+        if storage == "float32":
+            return f"HNSW{hnsw_m}"
+        if storage == "pq":
+            return f"HNSW{hnsw_m}_PQ{pq_subquantizers(dimension)}"
+        return f"HNSW{hnsw_m}_SQfp16"
+    if index_type in ("ivf_flat", "ivf_pq"):
+        return f"IVF{ivf_nlist(n_vectors)},{codec}"
+    raise ValueError(f"Unknown index type: {index_type} (expected one of {', '.join(INDEX_TYPES)})")
+
+
+def set_search_params(index: faiss.Index, nprobe: int, ef_search: int) -> None:
+    """Apply query-time knobs (IVF nprobe, HNSW efSearch) if the index has them."""
+    params = faiss.ParameterSpace()
+    for name, value in (("nprobe", nprobe), ("efSearch", ef_search)):
+        try:
+            params.set_index_parameter(index, name, value)
+        except RuntimeError:
+            pass
+
+
+def build_index(
+    vectors: np.ndarray,
+    index_type: str,
+    nprobe: int,
+    ef_search: int,
+    hnsw_m: int = 32,
+    max_training_points: int = 100_000,
+    metric: int = faiss.METRIC_L2,
+    storage: str = "float32",
+) -> faiss.Index:
+    """Build, train (on the corpus itself) and fill an index of the given type."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n_vectors, dimension = vectors.shape
+    description = factory_string(index_type, n_vectors, dimension, hnsw_m, storage)
+    index = faiss.index_factory(dimension, description, metric)
+    if not index.is_trained:
+        sample = vectors
+        if n_vectors > max_training_points:
+            rng = np.random.default_rng(0)
+            sample = vectors[rng.choice(n_vectors, max_training_points, replace=False)]
+        index.train(sample)
+    index.add(vectors)
+    set_search_params(index, nprobe, ef_search)
+    return index
+
+
+def bytes_per_vector(index: faiss.Index) -> float:
+    """Serialized size of an index divided by its vector count."""
+    if not index.ntotal:
+        return 0.0
+    return faiss.serialize_index(index).nbytes / index.ntotal
+
+
+def describe(index: faiss.Index) -> Optional[str]:
+    """Short human readable name of an index's type."""
+    name = type(faiss.downcast_index(index)).__name__
+    return name.replace("Index", "") or None
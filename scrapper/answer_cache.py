@@ -0,0 +1,164 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Hashable, List, Optional
+
+import numpy as np
+
+from scrapper.keyword_index import tokenize
+
+
+def key_terms(query: str) -> FrozenSet[str]:
+    """Terms with a digit (SKUs, model numbers, quantities), which embeddings barely tell apart."""
+    return frozenset(term for term in tokenize(query) if any(c.isdigit() for c in term))
+
+
+class CachedAnswer:
+    __slots__ = ("query", "terms", "answer", "results", "version", "created_at", "similarity")
+
+    def __init__(self, query: str, answer: str, results: List[Dict[str, Any]], version: Hashable):
+        self.query = query
+        self.terms = key_terms(query)
+        self.answer = answer
+        # Search results the answer was generated from, to rebuild the prompt for a new question
+        self.results = results
+        self.version = version
+        self.created_at = time.time()
+        self.similarity = 1.0
+
+
+class _SiteAnswers:
+    """One website's cached answers, with their query embeddings as a matrix."""
+
+    def __init__(self, version: Hashable):
+        self.version = version
+        self.answers: List[CachedAnswer] = []
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+
+
+class AnswerCache:
+    """Per-website cache of LLM answers, looked up by query-embedding similarity.
+
+    A question whose embedding has cosine similarity of at least
+    ``threshold`` with a cached question, and that names the same numbers
+    and SKUs, gets the cached answer, as long as the website's index version
+    is the one the answer was generated against. "Price of P0-12" and
+    "price of P0-13" embed almost identically, hence the term check. A new version drops the site's answers on the next lookup, and
+    ``invalidate`` drops them right away (e.g. after a re-scrape).
+    """
+
+    def __init__(self, max_entries_per_site: int, threshold: float, ttl_seconds: float, max_sites: int = 1024):
+        self.max_entries_per_site = max_entries_per_site
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_sites = max_sites
+        self._sites: "OrderedDict[str, _SiteAnswers]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries_per_site > 0
+
+    def get(self, website_id: Hashable, query: str, embedding: List[float], version: Hashable) -> Optional[CachedAnswer]:
+        if not self.enabled:
+            return None
+        vector = _unit(embedding)
+        terms = key_terms(query)
+        with self._lock:
+            site = self._site(str(website_id), version)
+            if site is None or not site.answers:
+                self.misses += 1
+                return None
+            similarities = site.vectors @ vector
+            for position, answer in enumerate(site.answers):
+                if answer.terms != terms:
+                    similarities[position] = -1.0
+            best = int(np.argmax(similarities))
+            answer = site.answers[best]
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+            if time.time() - answer.created_at >= self.ttl_seconds:
+                self._drop(site, best)
+                self.stale += 1
+                self.misses += 1
+                return None
+            self.hits += 1
+            answer.similarity = float(similarities[best])
+            return answer
+
+    def put(
+        self,
+        website_id: Hashable,
+        query: str,
+        embedding: List[float],
+        answer: str,
+        results: List[Dict[str, Any]],
+        version: Hashable,
+    ) -> None:
+        if not self.enabled:
+            return
+        vector = _unit(embedding)
+        with self._lock:
+            key = str(website_id)
+            site = self._site(key, version)
+            if site is None:
+                site = self._sites[key] = _SiteAnswers(version)
+                while len(self._sites) > self.max_sites:
+                    self._sites.popitem(last=False)
+            if site.answers and site.vectors.shape[1] != vector.shape[0]:
+                # Embedding model changed dimension; old vectors are not comparable
+                site.answers, site.vectors = [], np.zeros((0, 0), dtype=np.float32)
+            if len(site.answers) >= self.max_entries_per_site:
+                self._drop(site, 0)
+            site.answers.append(CachedAnswer(query, answer, results, version))
+            site.vectors = np.vstack([site.vectors, vector]) if site.answers[:-1] else vector.reshape(1, -1)
+
+    def invalidate(self, website_id: Hashable) -> None:
+        with self._lock:
+            if self._sites.pop(str(website_id), None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sites.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "sites": len(self._sites),
+                "entries": sum(len(site.answers) for site in self._sites.values()),
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _site(self, key: str, version: Hashable) -> Optional[_SiteAnswers]:
+        site = self._sites.get(key)
+        if site is None:
+            return None
+        if site.version != version:
+            del self._sites[key]
+            self.invalidations += 1
+            return None
+        self._sites.move_to_end(key)
+        return site
+
+    @staticmethod
+    def _drop(site: _SiteAnswers, position: int) -> None:
+        del site.answers[position]
+        site.vectors = np.delete(site.vectors, position, axis=0)
+
+
+def _unit(embedding: List[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
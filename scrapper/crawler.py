@@ -0,0 +1,195 @@
+import asyncio
+import hashlib
+from typing import AsyncIterator, Callable, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urldefrag, urlencode, urljoin, urlsplit, urlunsplit
+
+import aiohttp
+from bs4 import BeautifulSoup, SoupStrainer
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+SKIPPED_EXTENSIONS = (
+    ".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico", ".css", ".js",
+    ".zip", ".gz", ".mp3", ".mp4", ".avi", ".mov", ".woff", ".woff2", ".ttf", ".xml",
+)
+
+
+def normalize_url(url: str, base: Optional[str] = None) -> Optional[str]:
+    """Canonical form of an http(s) URL used for dedup, or None if it is not crawlable."""
+    if base:
+        url = urljoin(base, url)
+    url, _ = urldefrag(url.strip())
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower()
+    if parts.port and parts.port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{parts.port}"
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+    if path.lower().endswith(SKIPPED_EXTENSIONS):
+        return None
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not k.startswith("utm_")
+    ))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def site_domain(url: str) -> str:
+    """Host of a URL without a leading www., so example.com and www.example.com match."""
+    host = urlsplit(url).hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+
+class CrawledPage:
+    __slots__ = ("url", "html", "text")
+
+    def __init__(self, url: str, html: str, text: str):
+        self.url = url
+        self.html = html
+        self.text = text
+
+    def __repr__(self) -> str:
+        return f"CrawledPage(url={self.url!r}, chars={len(self.text)})"
+
+
+class Crawler:
+    """Concurrent same-domain crawler that streams pages as they are fetched.
+
+    Starting at ``start_url`` it follows links on the same domain until
+    ``max_pages`` distinct pages have been yielded. URLs are deduplicated on
+    their normalized form and pages on a hash of their extracted text.
+    Fetches share one pooled session with limits on total and per-host
+    connections; link discovery and text extraction run in worker threads.
+    """
+
+    def __init__(
+        self,
+        start_url: str,
+        max_pages: int,
+        extract_text: Callable[[str], str],
+        concurrency: int = 8,
+        per_host_concurrency: int = 4,
+        timeout: float = 15,
+        max_page_bytes: int = 5 * 1024 * 1024,
+        user_agent: str = "pipecat-chatbot-crawler/1.0",
+        queue_size: int = 16,
+    ):
+        self.start_url = normalize_url(start_url) or start_url
+        self.max_pages = max(1, max_pages)
+        self.extract_text = extract_text
+        self.concurrency = concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.timeout = timeout
+        self.max_page_bytes = max_page_bytes
+        self.user_agent = user_agent
+        self.queue_size = queue_size
+        self.domain = site_domain(self.start_url)
+        self.fetched = 0
+        self.failed = 0
+        self.duplicates = 0
+        self._seen_urls: Set[str] = set()
+        self._seen_content: Set[str] = set()
+        self._accepted = 0
+
+    async def crawl(self) -> AsyncIterator[CrawledPage]:
+        """Yield pages as soon as they are fetched and parsed."""
+        frontier: asyncio.Queue = asyncio.Queue()
+        # Bounded, so a slow consumer pauses the crawl instead of buffering the site
+        pages: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._seen_urls.add(self.start_url)
+        frontier.put_nowait(self.start_url)
+
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host_concurrency, ttl_dns_cache=300)
+        async with aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"User-Agent": self.user_agent},
+        ) as session:
+            workers = [asyncio.create_task(self._worker(session, frontier, pages)) for _ in range(self.concurrency)]
+
+            async def finish():
+                await frontier.join()
+                await pages.put(None)
+
+            finisher = asyncio.create_task(finish())
+            try:
+                while True:
+                    page = await pages.get()
+                    if page is None:
+                        break
+                    yield page
+            finally:
+                for task in workers + [finisher]:
+                    task.cancel()
+                await asyncio.gather(*workers, finisher, return_exceptions=True)
+
+    async def crawl_all(self) -> List[CrawledPage]:
+        return [page async for page in self.crawl()]
+
+    async def _worker(self, session: aiohttp.ClientSession, frontier: asyncio.Queue, pages: asyncio.Queue):
+        while True:
+            url = await frontier.get()
+            try:
+                if self._accepted >= self.max_pages:
+                    continue
+                html = await self._fetch(session, url)
+                if html is None:
+                    continue
+                try:
+                    links, text = await asyncio.to_thread(self._parse, url, html)
+                except Exception as e:
+                    print(f"Error parsing {url}: {e}")
+                    self.failed += 1
+                    continue
+
+                if self._accepted >= self.max_pages:
+                    continue
+                # Pages without text of their own (link hubs, JS-heavy index pages) still lead to content
+                for link in links:
+                    # Discovering far more URLs than we will ever fetch only costs memory
+                    if len(self._seen_urls) >= self.max_pages * 20:
+                        break
+                    if link not in self._seen_urls:
+                        self._seen_urls.add(link)
+                        frontier.put_nowait(link)
+
+                if not text:
+                    continue
+                digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+                if digest in self._seen_content:
+                    self.duplicates += 1
+                    continue
+                self._seen_content.add(digest)
+                self._accepted += 1
+                await pages.put(CrawledPage(url, html, text))
+            finally:
+                frontier.task_done()
+
+    async def _fetch(self, session: aiohttp.ClientSession, url: str) -> Optional[str]:
+        try:
+            async with session.get(url, allow_redirects=True) as response:
+                if response.status != 200 or "html" not in response.headers.get("Content-Type", "text/html"):
+                    self.failed += 1
+                    return None
+                body = bytearray()
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    body.extend(chunk)
+                    if len(body) >= self.max_page_bytes:
+                        break
+                self.fetched += 1
+                return body.decode(response.charset or "utf-8", errors="replace")
+        except (aiohttp.ClientError, asyncio.TimeoutError, LookupError) as e:
+            print(f"Error crawling {url}: {e}")
+            self.failed += 1
+            return None
+
+    def _parse(self, url: str, html: str) -> Tuple[List[str], str]:
+        links = []
+        for anchor in BeautifulSoup(html, "html.parser", parse_only=SoupStrainer("a")).find_all("a", href=True):
+            link = normalize_url(anchor["href"], base=url)
+            if link and site_domain(link) == self.domain:
+                links.append(link)
+        return links, self.extract_text(html)
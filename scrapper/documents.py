@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DocumentChanges:
+    """Outcome of comparing a documents directory with its manifest."""
+    __slots__ = ("added", "changed", "removed", "unchanged", "hashes")
+
+    def __init__(self):
+        self.added: List[str] = []
+        self.changed: List[str] = []
+        self.removed: List[str] = []
+        self.unchanged: List[str] = []
+        # Content hashes of added and changed files, and of files only touched
+        self.hashes: Dict[str, str] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def counts(self) -> Dict[str, int]:
+        return {name: len(getattr(self, name)) for name in ("added", "changed", "removed", "unchanged")}
+
+
+class DocumentManifest:
+    """Which local files went into a website's store, and which chunks each one produced.
+
+    Files are matched on their path relative to the documents directory. A
+    file counts as unchanged while its mtime and size match; otherwise its
+    content hash decides, so touching a file does not re-ingest it.
+    """
+
+    def __init__(self, path: str, directory: Optional[str] = None, files: Optional[Dict[str, dict]] = None):
+        self.path = path
+        self.directory = directory
+        self.files: Dict[str, dict] = files or {}
+
+    @classmethod
+    def load(cls, path: str) -> "DocumentManifest":
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(path, data.get("directory"), data.get("files", {}))
+        except (OSError, ValueError):
+            return cls(path)
+
+    def save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"directory": self.directory, "files": self.files}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def scan(self, directory: str, suffixes: Iterable[str]) -> DocumentChanges:
+        """Compare the supported files under directory with the manifest."""
+        changes = DocumentChanges()
+        root = Path(directory)
+        present = set()
+        for file_path in sorted(root.rglob("*")) if root.exists() else []:
+            if not file_path.is_file() or file_path.suffix not in suffixes:
+                continue
+            name = file_path.relative_to(root).as_posix()
+            present.add(name)
+            stat = file_path.stat()
+            entry = self.files.get(name)
+            if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                changes.unchanged.append(name)
+                continue
+            digest = file_hash(file_path)
+            changes.hashes[name] = digest
+            if entry is None:
+                changes.added.append(name)
+            elif entry["sha256"] == digest:
+                changes.unchanged.append(name)
+            else:
+                changes.changed.append(name)
+        changes.removed = sorted(set(self.files) - present)
+        return changes
+
+    def record(self, directory: str, name: str, digest: str, node_ids: Iterable[str]) -> None:
+        stat = (Path(directory) / name).stat()
+        self.files[name] = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": digest,
+            "node_ids": sorted(set(node_ids)),
+        }
+
+    def touch(self, directory: str, name: str) -> None:
+        """Refresh the stat of a file whose content did not change."""
+        stat = (Path(directory) / name).stat()
+        self.files[name].update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+
+    def forget(self, name: str) -> None:
+        self.files.pop(name, None)
+
+    def node_ids(self, names: Optional[Iterable[str]] = None) -> Set[str]:
+        names = self.files if names is None else names
+        return {node_id for name in names if name in self.files for node_id in self.files[name]["node_ids"]}
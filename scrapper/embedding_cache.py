@@ -0,0 +1,179 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+def normalize_query(text: str) -> str:
+    """Collapse case, whitespace and trailing punctuation so rephrased repeats share a key."""
+    text = re.sub(r"\s+", " ", text.strip().lower())
+    return text.rstrip("?!. ")
+
+
+def _to_blob(embedding: List[float]) -> bytes:
+    return np.asarray(embedding, dtype=np.float32).tobytes()
+
+
+def _from_blob(blob: bytes) -> List[float]:
+    return np.frombuffer(blob, dtype=np.float32).tolist()
+
+
+class QueryEmbeddingCache:
+    """LRU cache of query embeddings with a TTL and an optional SQLite tier.
+
+    Keys combine the embedding model name with the normalized query text, so
+    switching models never returns stale vectors. The SQLite tier lets the web
+    server and voice bot processes share embeddings and survive restarts.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings "
+                "(key TEXT PRIMARY KEY, embedding BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(model_name: str, text: str) -> str:
+        return hashlib.sha256(f"{model_name}\0{normalize_query(text)}".encode("utf-8")).hexdigest()
+
+    def get(self, model_name: str, text: str) -> Optional[List[float]]:
+        key = self.make_key(model_name, text)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                embedding, created_at = entry
+                if now - created_at < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return embedding
+                del self._entries[key]
+                self.expired += 1
+
+            if self._db is not None:
+                row = self._execute("SELECT embedding, created_at FROM query_embeddings WHERE key = ?", (key,))
+                if row is not None:
+                    if now - row[1] < self.ttl_seconds:
+                        embedding = _from_blob(row[0])
+                        self._remember(key, embedding, row[1])
+                        self.disk_hits += 1
+                        return embedding
+                    self._execute("DELETE FROM query_embeddings WHERE key = ?", (key,))
+                    self.expired += 1
+
+            self.misses += 1
+            return None
+
+    def put(self, model_name: str, text: str, embedding: List[float]) -> None:
+        key = self.make_key(model_name, text)
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, list(embedding), created_at)
+            if self._db is not None:
+                self._execute(
+                    "INSERT OR REPLACE INTO query_embeddings (key, embedding, created_at) VALUES (?, ?, ?)",
+                    (key, _to_blob(embedding), created_at),
+                )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._execute("DELETE FROM query_embeddings", ())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "persistent": self._db is not None,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
+
+    def _execute(self, sql: str, params: tuple):
+        """Run a statement on the SQLite tier; failures only cost a cache miss."""
+        try:
+            row = self._db.execute(sql, params).fetchone()
+            self._db.commit()
+            return row
+        except sqlite3.Error as e:
+            print(f"Query embedding cache error: {e}")
+            return None
+
+    def _remember(self, key: str, embedding: List[float], created_at: float) -> None:
+        self._entries[key] = (embedding, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ChunkEmbeddingStore:
+    """Persistent chunk embeddings addressed by (model name, content hash).
+
+    Re-scraping a website only has to embed chunks whose text was never seen
+    before by the same model; everything else is read back from here.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS chunk_embeddings "
+            "(model TEXT NOT NULL, hash TEXT NOT NULL, embedding BLOB NOT NULL, PRIMARY KEY (model, hash))"
+        )
+        self._db.commit()
+
+    def get_many(self, model_name: str, hashes: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._lock:
+            # Stay well under SQLite's bound parameter limit
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._db.execute(
+                    f"SELECT hash, embedding FROM chunk_embeddings WHERE model = ? AND hash IN ({placeholders})",
+                    (model_name, *batch),
+                ).fetchall()
+                found.update({h: _from_blob(blob) for h, blob in rows})
+        return found
+
+    def put_many(self, model_name: str, embeddings: Dict[str, List[float]]) -> None:
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO chunk_embeddings (model, hash, embedding) VALUES (?, ?, ?)",
+                [(model_name, h, _to_blob(e)) for h, e in embeddings.items()],
+            )
+            self._db.commit()
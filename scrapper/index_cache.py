@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+def store_signature(faiss_index_file: str, storage_dir: str) -> Optional[Tuple]:
+    """Return a cheap fingerprint of the files backing a store, or None if missing."""
+    signature = []
+    for path in (Path(faiss_index_file), Path(storage_dir) / "docstore.json"):
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        signature.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def store_size(faiss_index_file: str, storage_dir: str) -> int:
+    """Approximate the resident size of a loaded store by its on-disk size."""
+    size = 0
+    if os.path.exists(faiss_index_file):
+        size += os.path.getsize(faiss_index_file)
+    for path in Path(storage_dir).glob("*"):
+        if path.is_file() and path.resolve() != Path(faiss_index_file).resolve():
+            size += path.stat().st_size
+    return size
+
+
+class _Entry:
+    __slots__ = ("value", "signature", "size", "checked_at")
+
+    def __init__(self, value: Any, signature: Tuple, size: int):
+        self.value = value
+        self.signature = signature
+        self.size = size
+        self.checked_at = time.monotonic()
+
+
+class IndexCache:
+    """Process-wide LRU cache of loaded website indexes, bounded by total bytes.
+
+    Entries are keyed by website id and carry the signature of the files they
+    were loaded from. The signature is re-checked at most every
+    ``revalidate_seconds`` so hot websites are answered without touching disk,
+    while a re-scrape in another process is still picked up shortly after.
+    """
+
+    def __init__(self, max_bytes: int, revalidate_seconds: float = 5.0):
+        self.max_bytes = max_bytes
+        self.revalidate_seconds = revalidate_seconds
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, faiss_index_file: str, storage_dir: str) -> Optional[Any]:
+        """Return the cached value for key if its files have not changed."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            now = time.monotonic()
+            if now - entry.checked_at >= self.revalidate_seconds:
+                if store_signature(faiss_index_file, storage_dir) != entry.signature:
+                    self._remove(key)
+                    self.invalidations += 1
+                    self.misses += 1
+                    return None
+                entry.checked_at = now
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def put(self, key: Hashable, value: Any, faiss_index_file: str, storage_dir: str) -> None:
+        """Cache a freshly loaded value, evicting least recently used entries."""
+        signature = store_signature(faiss_index_file, storage_dir)
+        if signature is None:
+            return
+        size = store_size(faiss_index_file, storage_dir)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+            while self._entries and self.current_bytes + size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.size
+                self.evictions += 1
+            self._entries[key] = _Entry(value, signature, size)
+            self.current_bytes += size
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a cached entry, e.g. after its store was rewritten."""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self.current_bytes -= entry.size
@@ -0,0 +1,169 @@
+import math
+import os
+import re
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Words, plus compounds like SKUs, versions and hyphenated names ("xr-200", "v1.5")
+TOKEN_PATTERN = re.compile(r"\w+(?:[-./]\w+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms of a text; compound tokens are kept whole and also split into parts."""
+    terms = []
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        token = match.group()
+        terms.append(token)
+        if not token.isalnum():
+            terms.extend(part for part in re.split(r"[-./_]", token) if part)
+    return terms
+
+
+class KeywordIndex:
+    """Per-website BM25 index over chunk text, keyed by docstore node id.
+
+    Postings are kept per term as compact arrays of (document, term
+    frequency) pairs and can be appended to as chunks are ingested. Removed
+    chunks are tombstoned and dropped when the index is saved. The index is
+    persisted as a single .npz file next to the website's FAISS index.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._node_ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._lengths = array("I")
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._removed = set()
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._node_ids) - len(self._removed)
+
+    def __contains__(self, node_id: str) -> bool:
+        position = self._positions.get(node_id)
+        return position is not None and position not in self._removed
+
+    def add(self, node_id: str, text: str) -> None:
+        """Index a chunk; re-adding a known node id replaces its text."""
+        counts: Dict[str, int] = {}
+        for term in tokenize(text):
+            counts[term] = counts.get(term, 0) + 1
+        with self._lock:
+            if node_id in self._positions:
+                self._remove(node_id)
+            position = len(self._node_ids)
+            self._node_ids.append(node_id)
+            self._positions[node_id] = position
+            length = sum(counts.values())
+            self._lengths.append(length)
+            self._total_length += length
+            for term, count in counts.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = (array("I"), array("H"))
+                postings[0].append(position)
+                postings[1].append(min(count, 0xFFFF))
+
+    def add_many(self, items: Iterable[Tuple[str, str]]) -> None:
+        for node_id, text in items:
+            self.add(node_id, text)
+
+    def remove(self, node_id: str) -> None:
+        with self._lock:
+            self._remove(node_id)
+
+    def _remove(self, node_id: str) -> None:
+        position = self._positions.pop(node_id, None)
+        if position is not None and position not in self._removed:
+            self._removed.add(position)
+            self._total_length -= self._lengths[position]
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """Top k (node id, BM25 score) pairs for a query, best first."""
+        terms = set(tokenize(query))
+        with self._lock:
+            live = len(self)
+            if not terms or not live:
+                return []
+            lengths = np.frombuffer(self._lengths, dtype=np.uint32).astype(np.float32)
+            average_length = max(1.0, self._total_length / live)
+            scores = np.zeros(len(self._node_ids), dtype=np.float32)
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                documents = np.frombuffer(postings[0], dtype=np.uint32)
+                frequencies = np.frombuffer(postings[1], dtype=np.uint16).astype(np.float32)
+                idf = math.log(1 + (live - len(documents) + 0.5) / (len(documents) + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * lengths[documents] / average_length)
+                scores[documents] += idf * frequencies * (self.k1 + 1) / (frequencies + norm)
+            if self._removed:
+                scores[list(self._removed)] = 0.0
+            matched = np.flatnonzero(scores > 0)
+            if not len(matched):
+                return []
+            top = matched[np.argsort(-scores[matched], kind="stable")[:k]]
+            return [(self._node_ids[i], float(scores[i])) for i in top]
+
+    def save(self, path: str) -> None:
+        """Write the live postings to path atomically, compacting out removed chunks."""
+        with self._lock:
+            live = [i for i in range(len(self._node_ids)) if i not in self._removed]
+            remap = np.full(len(self._node_ids), -1, dtype=np.int64)
+            remap[live] = np.arange(len(live))
+            terms, offsets, documents, frequencies = [], [0], [], []
+            for term, (term_documents, term_frequencies) in self._postings.items():
+                kept = remap[np.frombuffer(term_documents, dtype=np.uint32)]
+                mask = kept >= 0
+                if not mask.any():
+                    continue
+                terms.append(term)
+                documents.append(kept[mask].astype(np.uint32))
+                frequencies.append(np.frombuffer(term_frequencies, dtype=np.uint16)[mask])
+                offsets.append(offsets[-1] + int(mask.sum()))
+            lengths = np.frombuffer(self._lengths, dtype=np.uint32)[live] if live else np.zeros(0, np.uint32)
+            node_ids = [self._node_ids[i] for i in live]
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                node_ids=np.array(node_ids, dtype=str),
+                lengths=lengths,
+                terms=np.array(terms, dtype=str),
+                offsets=np.array(offsets, dtype=np.int64),
+                documents=np.concatenate(documents) if documents else np.zeros(0, np.uint32),
+                frequencies=np.concatenate(frequencies) if frequencies else np.zeros(0, np.uint16),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["KeywordIndex"]:
+        """Read an index saved with save(), or None if the file is missing or unreadable."""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+        except (OSError, ValueError, KeyError):
+            return None
+
+        index = cls()
+        index._node_ids = arrays["node_ids"].tolist()
+        index._positions = {node_id: i for i, node_id in enumerate(index._node_ids)}
+        index._lengths = array("I", arrays["lengths"].astype(np.uint32).tobytes())
+        index._total_length = int(arrays["lengths"].sum())
+        offsets = arrays["offsets"]
+        documents = arrays["documents"].astype(np.uint32)
+        frequencies = arrays["frequencies"].astype(np.uint16)
+        for i, term in enumerate(arrays["terms"].tolist()):
+            start, end = offsets[i], offsets[i + 1]
+            index._postings[term] = (
+                array("I", documents[start:end].tobytes()),
+                array("H", frequencies[start:end].tobytes()),
+            )
+        return index
@@ -0,0 +1,181 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from llama_index.core import Settings, VectorStoreIndex
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.schema import MetadataMode, TextNode
+
+from scrapper.crawler import CrawledPage
+from scrapper.embedding_cache import content_hash
+from scrapper.keyword_index import KeywordIndex
+from scrapper.scrapper import Config, DocumentProcessor, chunk_embedding_store
+
+_DONE = object()
+
+
+class IngestPipeline:
+    """Streaming ingest: fetch/extract → chunk → embed → index as concurrent stages.
+
+    Stages are joined by bounded queues, so a slow stage applies backpressure
+    to the ones before it and memory stays bounded by the queue sizes rather
+    than by the size of the site. Chunking and index inserts run in worker
+    threads, and up to ``embed_workers`` embedding batches are in flight at
+    once, so wall-clock time tracks the slowest stage instead of the sum.
+    """
+
+    def __init__(
+        self,
+        embed_model: BaseEmbedding,
+        queue_size: int = Config.INGEST_QUEUE_SIZE,
+        embed_workers: int = Config.EMBED_MAX_CONCURRENCY,
+        batch_size: Optional[int] = None,
+        batch_linger: float = Config.INGEST_BATCH_LINGER,
+    ):
+        self.embed_model = embed_model
+        self.queue_size = queue_size
+        self.embed_workers = embed_workers
+        self.batch_size = batch_size or embed_model.embed_batch_size
+        self.batch_linger = batch_linger
+        self._seen_hashes = set()
+        self.stats: Dict[str, Any] = {}
+
+    async def run(
+        self, pages: AsyncIterator[CrawledPage], index: VectorStoreIndex, keywords: Optional[KeywordIndex] = None
+    ) -> Dict[str, Any]:
+        """Stream pages into index (and keywords, if given) and return ingest statistics."""
+        self._seen_hashes = set()
+        self.stats = {
+            "pages": 0, "chunks": 0, "reused": 0, "fetched": 0, "batches": 0,
+            "busy_seconds": {"chunk": 0.0, "embed": 0.0, "index": 0.0},
+        }
+        page_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        chunk_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size * self.batch_size)
+        index_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+
+        started = time.perf_counter()
+        tasks = [
+            asyncio.create_task(self._source(pages, page_queue)),
+            asyncio.create_task(self._chunk(page_queue, chunk_queue)),
+            asyncio.create_task(self._embed(chunk_queue, index_queue)),
+            asyncio.create_task(self._index(index_queue, index, keywords)),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if hasattr(pages, "aclose"):
+                await pages.aclose()
+
+        self.stats["elapsed_seconds"] = time.perf_counter() - started
+        return self.stats
+
+    async def _source(self, pages: AsyncIterator[CrawledPage], out: asyncio.Queue):
+        async for page in pages:
+            self.stats["pages"] += 1
+            await out.put(page)
+        await out.put(_DONE)
+
+    async def _chunk(self, inbox: asyncio.Queue, out: asyncio.Queue):
+        while (page := await inbox.get()) is not _DONE:
+            started = time.perf_counter()
+            chunks = await asyncio.to_thread(self._split_page, page)
+            self.stats["busy_seconds"]["chunk"] += time.perf_counter() - started
+            for chunk in chunks:
+                if chunk[2] in self._seen_hashes:
+                    continue
+                self._seen_hashes.add(chunk[2])
+                await out.put(chunk)
+        await out.put(_DONE)
+
+    @staticmethod
+    def _split_page(page: CrawledPage) -> List[Tuple[TextNode, str, str]]:
+        nodes = Settings.node_parser.get_nodes_from_documents(DocumentProcessor.page_documents(page))
+        chunks = []
+        for node in nodes:
+            text = node.get_content(metadata_mode=MetadataMode.EMBED)
+            node.id_ = content_hash(text)
+            chunks.append((node, text, node.id_))
+        return chunks
+
+    async def _embed(self, inbox: asyncio.Queue, out: asyncio.Queue):
+        in_flight = set()
+        # Batches drop out of in_flight when they finish, so their errors are kept here
+        failures = []
+        slots = asyncio.Semaphore(self.embed_workers)
+
+        def finished(task: asyncio.Task):
+            in_flight.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                failures.append(task.exception())
+
+        done = False
+        while not done and not failures:
+            batch, done = await self._next_batch(inbox)
+            if batch:
+                await slots.acquire()
+                task = asyncio.create_task(self._embed_batch(batch, out, slots))
+                in_flight.add(task)
+                task.add_done_callback(finished)
+        await asyncio.gather(*in_flight, return_exceptions=True)
+        # A missing batch would leave a partial index that replaces the complete one
+        if failures:
+            raise failures[0]
+        await out.put(_DONE)
+
+    async def _next_batch(self, inbox: asyncio.Queue) -> Tuple[list, bool]:
+        """Collect up to batch_size chunks, lingering briefly so batches fill up."""
+        batch = []
+        item = await inbox.get()
+        deadline = time.monotonic() + self.batch_linger
+        while item is not _DONE:
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                return batch, False
+            try:
+                item = await asyncio.wait_for(inbox.get(), max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                return batch, False
+        return batch, True
+
+    async def _embed_batch(self, batch: list, out: asyncio.Queue, slots: asyncio.Semaphore):
+        try:
+            started = time.perf_counter()
+            model_name = self.embed_model.model_name
+            chunk_store = chunk_embedding_store()
+            hashes = [node_hash for _, _, node_hash in batch]
+            embeddings = await asyncio.to_thread(chunk_store.get_many, model_name, hashes)
+            missing = [(text, node_hash) for _, text, node_hash in batch if node_hash not in embeddings]
+            if missing:
+                fetched = await self.embed_model.aget_text_embedding_batch([text for text, _ in missing])
+                fetched = {node_hash: embedding for (_, node_hash), embedding in zip(missing, fetched)}
+                await asyncio.to_thread(chunk_store.put_many, model_name, fetched)
+                embeddings.update(fetched)
+
+            nodes = []
+            for node, _, node_hash in batch:
+                node.embedding = embeddings[node_hash]
+                nodes.append(node)
+            self.stats["chunks"] += len(batch)
+            self.stats["reused"] += len(batch) - len(missing)
+            self.stats["fetched"] += len(missing)
+            self.stats["batches"] += 1
+            self.stats["busy_seconds"]["embed"] += time.perf_counter() - started
+            await out.put(nodes)
+        finally:
+            slots.release()
+
+    async def _index(self, inbox: asyncio.Queue, index: VectorStoreIndex, keywords: Optional[KeywordIndex]):
+        while (nodes := await inbox.get()) is not _DONE:
+            started = time.perf_counter()
+            # Nodes already carry embeddings, so this only adds them to FAISS and the docstore
+            await asyncio.to_thread(self._insert, nodes, index, keywords)
+            self.stats["busy_seconds"]["index"] += time.perf_counter() - started
+
+    @staticmethod
+    def _insert(nodes: List[TextNode], index: VectorStoreIndex, keywords: Optional[KeywordIndex]):
+        index.insert_nodes(nodes)
+        if keywords is not None:
+            keywords.add_many((node.node_id, node.get_content()) for node in nodes)
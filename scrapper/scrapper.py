@@ -1,3 +1,6 @@
+import asyncio
+import dataclasses
+import aiohttp
 import requests
 from bs4 import BeautifulSoup
 import json
@@ -6,50 +9,166 @@ import faiss
 import os
 import time
 import shutil
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Union, Dict, Any
+from typing import List, Optional, Tuple, Union, Dict, Any
 from llama_index.core import VectorStoreIndex, StorageContext, load_index_from_storage, Settings
-from llama_index.core.schema import Document
+from llama_index.core.schema import BaseNode, Document, MetadataMode, TextNode
+from llama_index.core.vector_stores.types import VectorStoreQuery, VectorStoreQueryResult
 from llama_index.vector_stores.faiss import FaissVectorStore
 from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.utils import get_tokenizer
 from dotenv import load_dotenv
+from scrapper.index_cache import IndexCache, store_signature
+from scrapper.answer_cache import AnswerCache
+from scrapper.embedding_cache import ChunkEmbeddingStore, QueryEmbeddingCache, content_hash
+from scrapper.crawler import CrawledPage, Crawler
+from scrapper.keyword_index import KeywordIndex
+from scrapper.documents import DocumentManifest
+from scrapper import ann
 
 load_dotenv(override=True)
 
 class Config:
-    CLOUDFLARE_API_URL = "https://api.cloudflare.com/client/v4/accounts/bf52f6782290abdecd497dbd48c23ef3/ai/run/@cf/baai/bge-large-en-v1.5"
+    CLOUDFLARE_API_URL = os.getenv("CLOUDFLARE_API_URL", "https://api.cloudflare.com/client/v4/accounts/bf52f6782290abdecd497dbd48c23ef3/ai/run/@cf/baai/bge-large-en-v1.5")
     CLOUDFLARE_API_KEY = os.getenv("CLOUDFLARE_API_KEY")
+    EMBEDDING_MODEL = "@cf/baai/bge-large-en-v1.5"
+    EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 100))
+    EMBED_MAX_BATCH_BYTES = int(os.getenv("EMBED_MAX_BATCH_BYTES", 256 * 1024))
+    EMBED_TIMEOUT = float(os.getenv("EMBED_TIMEOUT", 30))
+    EMBED_MAX_CONCURRENCY = int(os.getenv("EMBED_MAX_CONCURRENCY", 8))
     FAISS_INDEX_FILE = "faiss_index.bin"
-    STORAGE_DIR = "storage/"
+    WEBSITES_DIR = "scrapper/websites"
     CHUNK_SIZE = 500
     EMBEDDING_DIMENSION = 1024
     SUPPORTED_FILE_TYPES = ('.txt', '.md', '.html')
     DEFAULT_URL = "https://example.com"
+    INDEX_CACHE_MAX_BYTES = int(os.getenv("INDEX_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+    INDEX_CACHE_REVALIDATE_SECONDS = float(os.getenv("INDEX_CACHE_REVALIDATE_SECONDS", 5))
+    QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", 10000))
+    QUERY_EMBEDDING_CACHE_TTL = float(os.getenv("QUERY_EMBEDDING_CACHE_TTL", 7 * 24 * 3600))
+    # Set to a file path (e.g. scrapper/cache/query_embeddings.db) to persist and share across processes
+    QUERY_EMBEDDING_CACHE_DB = os.getenv("QUERY_EMBEDDING_CACHE_DB") or None
+    CHUNK_EMBEDDING_DB = os.getenv("CHUNK_EMBEDDING_DB", "scrapper/cache/chunk_embeddings.db")
+    # Answers reused for near-duplicate questions; 0 entries disables the cache
+    ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", 256))
+    ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", 0.95))
+    ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", 24 * 3600))
+    CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", 8))
+    CRAWL_PER_HOST_CONCURRENCY = int(os.getenv("CRAWL_PER_HOST_CONCURRENCY", 4))
+    CRAWL_TIMEOUT = float(os.getenv("CRAWL_TIMEOUT", 15))
+    CRAWL_MAX_PAGE_BYTES = int(os.getenv("CRAWL_MAX_PAGE_BYTES", 5 * 1024 * 1024))
+    INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", 8))
+    INGEST_BATCH_LINGER = float(os.getenv("INGEST_BATCH_LINGER", 0.05))
+    # flat, hnsw, ivf_flat, ivf_pq, or auto to choose by corpus size
+    FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "auto")
+    # Per-website overrides, e.g. FAISS_INDEX_TYPES="3:hnsw,7:ivf_pq"
+    FAISS_INDEX_TYPES = dict(
+        item.split(":", 1) for item in os.getenv("FAISS_INDEX_TYPES", "").split(",") if ":" in item
+    )
+    FAISS_FLAT_MAX_VECTORS = int(os.getenv("FAISS_FLAT_MAX_VECTORS", 5000))
+    FAISS_HNSW_MAX_VECTORS = int(os.getenv("FAISS_HNSW_MAX_VECTORS", 200000))
+    FAISS_HNSW_M = int(os.getenv("FAISS_HNSW_M", 32))
+    FAISS_EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", 128))
+    FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", 16))
+    # l2 on raw vectors, or cosine: L2-normalize at ingest and query time and search by inner product
+    VECTOR_METRIC = os.getenv("VECTOR_METRIC", "l2")
+    # float32, float16 (scalar quantization) or pq (product quantization); see README for bytes per chunk
+    VECTOR_STORAGE = os.getenv("VECTOR_STORAGE", "float32")
+    INDEX_META_FILE = "index_meta.json"
+    # Chunks returned per query, and the lowest cosine-style score still considered relevant
+    SEARCH_TOP_K = int(os.getenv("SEARCH_TOP_K", 5))
+    SEARCH_MIN_SCORE = float(os.getenv("SEARCH_MIN_SCORE", 0.3))
+    # Token budget for retrieved context in an LLM prompt
+    CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", 1500))
+    # hybrid (BM25 + vectors fused by reciprocal rank), vector or keyword
+    SEARCH_MODE = os.getenv("SEARCH_MODE", "hybrid")
+    SEARCH_CANDIDATES = int(os.getenv("SEARCH_CANDIDATES", 20))
+    RRF_K = int(os.getenv("RRF_K", 60))
+    # Past this the query embedding is abandoned and search answers from keywords alone
+    SEARCH_EMBED_TIMEOUT = float(os.getenv("SEARCH_EMBED_TIMEOUT", 2.0))
+    # After a failed or slow query embedding, skip embedding for this long
+    SEARCH_EMBED_COOLDOWN = float(os.getenv("SEARCH_EMBED_COOLDOWN", 30))
+    KEYWORD_INDEX_FILE = "keyword_index.npz"
+    # Local files are only read by the explicit ingest (ingest_documents.py or the API), never on queries
+    DOCUMENTS_DIR = os.getenv("DOCUMENTS_DIR", "documents")
+    DOCUMENTS_MANIFEST_FILE = "documents_manifest.json"
+
+# Loaded indexes and their search engines, shared by every EmbeddingService in the process
+INDEX_CACHE = IndexCache(Config.INDEX_CACHE_MAX_BYTES, Config.INDEX_CACHE_REVALIDATE_SECONDS)
+
+# Query embeddings by model + normalized text, so repeated questions skip the network
+QUERY_EMBEDDING_CACHE = QueryEmbeddingCache(
+    Config.QUERY_EMBEDDING_CACHE_SIZE,
+    Config.QUERY_EMBEDDING_CACHE_TTL,
+    Config.QUERY_EMBEDDING_CACHE_DB,
+)
+
+# Generated answers per website, reused for near-duplicate questions until the index changes
+ANSWER_CACHE = AnswerCache(Config.ANSWER_CACHE_SIZE, Config.ANSWER_CACHE_THRESHOLD, Config.ANSWER_CACHE_TTL)
 
 class CloudflareEmbedding(BaseEmbedding):
-    def __init__(self, **kwargs: Any):
+    def __init__(self, max_batch_bytes: int = Config.EMBED_MAX_BATCH_BYTES, **kwargs: Any):
+        kwargs.setdefault("embed_batch_size", Config.EMBED_BATCH_SIZE)
+        kwargs.setdefault("model_name", Config.EMBEDDING_MODEL)
         super().__init__(**kwargs)
+        self._max_batch_bytes = max_batch_bytes
         self._session = requests.Session()
-        self._session.headers.update({
+        self._session.headers.update(self._headers())
+        # Pooled session and concurrency limit per event loop: the server's loop and
+        # each run_sync scrape loop get their own, and close them on that loop
+        self._async_state = weakref.WeakKeyDictionary()
+        self._async_state_lock = threading.Lock()
+
+    @staticmethod
+    def _headers() -> Dict[str, str]:
+        return {
             "Authorization": f"Bearer {Config.CLOUDFLARE_API_KEY}",
             "Content-Type": "application/json"
-        })
+        }
 
     def _get_text_embedding(self, text: str) -> list:
         print(f"Getting embedding for text: {text}")
+        return self._post_embeddings([text])[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[list]:
+        """Embed texts in as few requests as the batch size and byte cap allow."""
+        embeddings = []
+        for batch in self._split_batches(texts):
+            print(f"Getting embeddings for a batch of {len(batch)} texts")
+            embeddings.extend(self._post_embeddings(batch))
+        return embeddings
+
+    def _split_batches(self, texts: List[str]) -> List[List[str]]:
+        """Group texts by count and by encoded size of the request payload."""
+        batches = []
+        batch, batch_bytes = [], 0
+        for text in texts:
+            # json.dumps escapes non-ASCII, so this is the text's size on the wire
+            text_bytes = len(json.dumps(text)) + 2
+            if batch and (len(batch) >= self.embed_batch_size or
+                          batch_bytes + text_bytes > self._max_batch_bytes):
+                batches.append(batch)
+                batch, batch_bytes = [], 0
+            batch.append(text)
+            batch_bytes += text_bytes
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _post_embeddings(self, texts: List[str]) -> List[list]:
         max_retries = 3
         for attempt in range(max_retries):
             try:
                 response = self._session.post(
                     Config.CLOUDFLARE_API_URL,
-                    data=json.dumps({"text": text})
+                    data=json.dumps({"text": texts}),
+                    timeout=Config.EMBED_TIMEOUT
                 )
                 response.raise_for_status()
-                result = response.json()
-                
-                if "result" in result and "data" in result["result"]:
-                    return result["result"]["data"][0]
-                raise ValueError(f"Unexpected API response structure: {result}")
+                return self._parse_embeddings(response.json(), texts)
             
             except (requests.RequestException, ValueError) as e:
                 if attempt == max_retries - 1:
@@ -57,28 +176,158 @@ class CloudflareEmbedding(BaseEmbedding):
                 print(f"Retry {attempt + 1}/{max_retries} after error: {str(e)}")
                 time.sleep(2 ** attempt)
 
+    @staticmethod
+    def _parse_embeddings(result: Dict[str, Any], texts: List[str]) -> List[list]:
+        if "result" in result and "data" in result["result"]:
+            data = result["result"]["data"]
+            if len(data) != len(texts):
+                raise ValueError(f"Expected {len(texts)} embeddings, got {len(data)}")
+            return data
+        raise ValueError(f"Unexpected API response structure: {result}")
+
     def _get_query_embedding(self, query: str) -> list:
-        return self._get_text_embedding(query)
+        embedding = QUERY_EMBEDDING_CACHE.get(self.model_name, query)
+        if embedding is None:
+            embedding = self._get_text_embedding(query)
+            QUERY_EMBEDDING_CACHE.put(self.model_name, query, embedding)
+        return embedding
 
     async def _aget_query_embedding(self, query: str) -> list:
-        return self._get_text_embedding(query)
+        embedding = QUERY_EMBEDDING_CACHE.get(self.model_name, query)
+        if embedding is None:
+            embedding = (await self._apost_embeddings([query]))[0]
+            QUERY_EMBEDDING_CACHE.put(self.model_name, query, embedding)
+        return embedding
+
+    async def _aget_text_embedding(self, text: str) -> list:
+        return (await self._apost_embeddings([text]))[0]
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[list]:
+        """Embed batches concurrently, bounded by EMBED_MAX_CONCURRENCY."""
+        results = await asyncio.gather(*[
+            self._apost_embeddings(batch) for batch in self._split_batches(texts)
+        ])
+        return [embedding for batch in results for embedding in batch]
+
+    def _get_async_session(self) -> Tuple[aiohttp.ClientSession, asyncio.Semaphore]:
+        """Return the pooled session and request limit of the running event loop, creating them on first use."""
+        loop = asyncio.get_running_loop()
+        with self._async_state_lock:
+            state = self._async_state.get(loop)
+            if state is None or state[0].closed:
+                state = self._async_state[loop] = (
+                    aiohttp.ClientSession(
+                        headers=self._headers(),
+                        connector=aiohttp.TCPConnector(limit=Config.EMBED_MAX_CONCURRENCY),
+                        timeout=aiohttp.ClientTimeout(total=Config.EMBED_TIMEOUT),
+                    ),
+                    asyncio.Semaphore(Config.EMBED_MAX_CONCURRENCY),
+                )
+            return state
+
+    async def _apost_embeddings(self, texts: List[str]) -> List[list]:
+        session, semaphore = self._get_async_session()
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                async with semaphore:
+                    async with session.post(Config.CLOUDFLARE_API_URL, data=json.dumps({"text": texts})) as response:
+                        response.raise_for_status()
+                        result = await response.json(content_type=None)
+                return self._parse_embeddings(result, texts)
+
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                if attempt == max_retries - 1:
+                    raise Exception(f"Failed to get embedding after {max_retries} attempts: {str(e)}")
+                print(f"Retry {attempt + 1}/{max_retries} after error: {str(e)}")
+                await asyncio.sleep(2 ** attempt)
+
+    async def aclose(self):
+        """Close the running event loop's pooled session; other loops' sessions stay open."""
+        with self._async_state_lock:
+            state = self._async_state.pop(asyncio.get_running_loop(), None)
+        if state is not None and not state[0].closed:
+            await state[0].close()
+
+_default_embed_model = None
+_default_embed_model_lock = threading.Lock()
+
+def default_embed_model() -> CloudflareEmbedding:
+    """Process-wide embedding model, so every store shares one connection pool."""
+    global _default_embed_model
+    with _default_embed_model_lock:
+        if _default_embed_model is None:
+            _default_embed_model = CloudflareEmbedding()
+        return _default_embed_model
+
+def run_sync(coro):
+    """Run a coroutine to completion from sync code, even on a thread with a running loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
 
 class DocumentProcessor:
     @staticmethod
     def scrape_website(url: str) -> str:
         """Fetch and parse website content."""
         try:
-            response = requests.get(url)
+            response = requests.get(url, timeout=Config.CRAWL_TIMEOUT)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            # Get text from paragraphs, headers, and other relevant tags
-            text_elements = soup.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'article', 'section'])
-            text = ' '.join([elem.get_text(strip=True) for elem in text_elements if elem.get_text(strip=True)])
-            return text
+            return DocumentProcessor.extract_text(response.text)
         except Exception as e:
             print(f"Error scraping {url}: {e}")
             return ""
 
+    @staticmethod
+    def extract_text(html: str) -> str:
+        """Extract readable text from an HTML page."""
+        soup = BeautifulSoup(html, 'html.parser')
+        # Get text from paragraphs, headers, and other relevant tags
+        text_elements = soup.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'article', 'section'])
+        return ' '.join([elem.get_text(strip=True) for elem in text_elements if elem.get_text(strip=True)])
+
+    @staticmethod
+    def crawler(url: str, sublinks: int = 0) -> Crawler:
+        """Crawler for a website: the start page plus up to `sublinks` pages on the same domain."""
+        return Crawler(
+            url,
+            max_pages=1 + max(0, int(sublinks or 0)),
+            extract_text=DocumentProcessor.extract_text,
+            concurrency=Config.CRAWL_CONCURRENCY,
+            per_host_concurrency=Config.CRAWL_PER_HOST_CONCURRENCY,
+            timeout=Config.CRAWL_TIMEOUT,
+            max_page_bytes=Config.CRAWL_MAX_PAGE_BYTES,
+        )
+
+    @staticmethod
+    def page_documents(page: CrawledPage) -> List[Document]:
+        """Chunk a crawled page into documents that remember their source URL."""
+        return [
+            Document(
+                text=chunk,
+                metadata={"url": page.url},
+                excluded_embed_metadata_keys=["url"],
+                excluded_llm_metadata_keys=["url"],
+            )
+            for chunk in DocumentProcessor.chunk_text(page.text) if chunk.strip()
+        ]
+
+    @staticmethod
+    def file_documents(file_path: Union[str, Path]) -> List[Document]:
+        """Chunk a local file into documents that remember which file they came from."""
+        return [
+            Document(
+                text=chunk,
+                metadata={"file_path": str(file_path)},
+                excluded_embed_metadata_keys=["file_path"],
+                excluded_llm_metadata_keys=["file_path"],
+            )
+            for chunk in DocumentProcessor.chunk_text(DocumentProcessor.read_file(file_path)) if chunk.strip()
+        ]
+
     @staticmethod
     def read_file(file_path: Union[str, Path]) -> str:
         """Read content from various file types."""
@@ -123,42 +372,109 @@ class DocumentProcessor:
         
         return chunks
 
+Settings.llm = None  # Disable OpenAI
+
+class WebsiteStore:
+    """Handle on the files of a single website's vector store.
+
+    Every store carries its own paths, so work on different websites never
+    shares mutable state. Instances for the same website share one lock that
+    serializes loading against rebuilding.
+    """
+    _locks: Dict[str, threading.RLock] = {}
+    _locks_guard = threading.Lock()
+
+    def __init__(self, website_id, url: Optional[str] = None, root: Optional[str] = None, sublinks: int = 0):
+        self.website_id = str(website_id)
+        self.url = url or Config.DEFAULT_URL
+        self.sublinks = int(sublinks or 0)
+        self.index_type = Config.FAISS_INDEX_TYPES.get(self.website_id, Config.FAISS_INDEX_TYPE)
+        self.storage_dir = os.path.join(root or Config.WEBSITES_DIR, self.website_id) + os.sep
+        self.faiss_index_file = os.path.join(self.storage_dir, Config.FAISS_INDEX_FILE)
+        self.meta_file = os.path.join(self.storage_dir, Config.INDEX_META_FILE)
+        self.keyword_index_file = os.path.join(self.storage_dir, Config.KEYWORD_INDEX_FILE)
+        self.documents_manifest_file = os.path.join(self.storage_dir, Config.DOCUMENTS_MANIFEST_FILE)
+        with WebsiteStore._locks_guard:
+            self.lock = WebsiteStore._locks.setdefault(self.website_id, threading.RLock())
+
+    def __repr__(self) -> str:
+        return f"WebsiteStore(website_id={self.website_id!r}, url={self.url!r})"
+
+_chunk_embedding_store = None
+_chunk_embedding_store_lock = threading.Lock()
+
+def chunk_embedding_store() -> ChunkEmbeddingStore:
+    """Process-wide content-addressed store of chunk embeddings."""
+    global _chunk_embedding_store
+    with _chunk_embedding_store_lock:
+        if _chunk_embedding_store is None:
+            _chunk_embedding_store = ChunkEmbeddingStore(Config.CHUNK_EMBEDDING_DB)
+        return _chunk_embedding_store
+
+class NormalizedFaissVectorStore(FaissVectorStore):
+    """FAISS store that L2-normalizes vectors on add and query.
+
+    With an inner-product index this ranks by cosine similarity, which is
+    what bge embeddings are trained for.
+    """
+
+    def add(self, nodes: List[BaseNode], **add_kwargs: Any) -> List[str]:
+        if not nodes:
+            return []
+        vectors = np.array([node.get_embedding() for node in nodes], dtype="float32")
+        faiss.normalize_L2(vectors)
+        start = self._faiss_index.ntotal
+        self._faiss_index.add(vectors)
+        return [str(start + i) for i in range(len(nodes))]
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        embedding = np.array(query.query_embedding, dtype="float32")
+        norm = np.linalg.norm(embedding)
+        if norm:
+            query = dataclasses.replace(query, query_embedding=(embedding / norm).tolist())
+        return super().query(query, **kwargs)
+
+def faiss_vector_store(faiss_index, normalized: bool) -> FaissVectorStore:
+    return NormalizedFaissVectorStore(faiss_index) if normalized else FaissVectorStore(faiss_index)
+
 class VectorStoreManager:
-    def __init__(self):
-        self.embedding_model = CloudflareEmbedding()
-        Settings.embed_model = self.embedding_model
-        Settings.llm = None  # Disable OpenAI
+    def __init__(self, store: WebsiteStore, embed_model: Optional[BaseEmbedding] = None):
+        self.store = store
+        self.embedding_model = embed_model or default_embed_model()
+        self.last_build_stats: Dict[str, int] = {}
 
-    def create_or_load_store(self, documents: Optional[List[Document]] = None) -> VectorStoreIndex:
+    def create_or_load_store(self, documents: Optional[List[Document]] = None, rebuild: bool = False) -> VectorStoreIndex:
         """Create new store or load existing one."""
-        if self._check_existing_store():
+        exists = self._check_existing_store()
+        if not rebuild and exists:
             return self._load_existing_store()
         
         if documents is None:
-            # If no documents provided and no existing store, scrape default website
-            print("No local files or existing store found. Scraping example.com...")
-            processor = DocumentProcessor()
-            content = processor.scrape_website(Config.DEFAULT_URL)
-            chunks = processor.chunk_text(content)
-            documents = [Document(text=chunk) for chunk in chunks if chunk.strip()]
+            # No documents provided: build the store by scraping the website
+            if exists:
+                print(f"Rebuild requested for website {self.store.website_id}; re-scraping {self.store.url}...")
+            else:
+                print(f"No existing store for website {self.store.website_id}. Scraping {self.store.url}...")
+            return self._ingest_website()
         
         return self._create_new_store(documents)
 
     def _check_existing_store(self) -> bool:
         """Check if valid store exists."""
-        return (Path(Config.FAISS_INDEX_FILE).exists() and 
-                Path(Config.STORAGE_DIR).exists())
+        return (Path(self.store.faiss_index_file).exists() and
+                Path(self.store.storage_dir).exists())
 
     def _load_existing_store(self) -> VectorStoreIndex:
         """Load existing vector store."""
         try:
-            faiss_index = faiss.read_index(Config.FAISS_INDEX_FILE)
-            vector_store = FaissVectorStore(faiss_index)
+            faiss_index = faiss.read_index(self.store.faiss_index_file)
+            ann.set_search_params(faiss_index, Config.FAISS_NPROBE, Config.FAISS_EF_SEARCH)
+            vector_store = faiss_vector_store(faiss_index, self._read_meta().get("normalized", False))
             storage_context = StorageContext.from_defaults(
                 vector_store=vector_store,
-                persist_dir=Config.STORAGE_DIR
+                persist_dir=self.store.storage_dir
             )
-            return load_index_from_storage(storage_context)
+            return load_index_from_storage(storage_context, embed_model=self.embedding_model)
         except Exception as e:
             print(f"Error loading existing store: {e}")
             self._cleanup_storage()
@@ -168,96 +484,539 @@ class VectorStoreManager:
         """Create new vector store."""
         if not documents:
             raise ValueError("No documents provided to create store")
-            
-        self._cleanup_storage()
-        
-        faiss_index = faiss.IndexFlatL2(Config.EMBEDDING_DIMENSION)
-        vector_store = FaissVectorStore(faiss_index)
+
+        nodes = self._embed_nodes(Settings.node_parser.get_nodes_from_documents(documents))
+        index, faiss_index = self._new_index(nodes)
+        return self._persist(index, faiss_index)
+
+    def _ingest_website(self) -> VectorStoreIndex:
+        """Crawl the website and stream its pages through the ingest pipeline."""
+        from scrapper.pipeline import IngestPipeline
+
+        previous_ids = self._stored_node_ids()
+        index, faiss_index = self._new_index([])
+        keywords = KeywordIndex()
+        crawler = DocumentProcessor.crawler(self.store.url, self.store.sublinks)
+
+        async def ingest():
+            try:
+                return await IngestPipeline(self.embedding_model).run(crawler.crawl(), index, keywords)
+            finally:
+                # The pooled session belongs to this short-lived event loop
+                if hasattr(self.embedding_model, "aclose"):
+                    await self.embedding_model.aclose()
+
+        stats = run_sync(ingest())
+        if not stats["chunks"]:
+            raise ValueError(f"No content scraped from {self.store.url}")
+
+        stats["removed"] = len(previous_ids - set(index.index_struct.nodes_dict.values()))
+        self.last_build_stats = stats
+        print(f"Ingested website {self.store.website_id}: {stats}")
+        return self._persist(index, faiss_index, keywords)
+
+    def ingest_documents(self, directory: str) -> Dict[str, int]:
+        """Bring the store up to date with the supported files in directory.
+
+        Only new or changed files are read. If files were only added, their
+        chunks are appended to the existing index. Changed or removed files
+        need their old vectors gone, which FAISS cannot do in place, so the
+        index is rebuilt; every unchanged chunk's embedding comes from the
+        chunk embedding cache, so only new text is sent to the embedding API.
+        """
+        manifest = DocumentManifest.load(self.store.documents_manifest_file)
+        changes = manifest.scan(directory, Config.SUPPORTED_FILE_TYPES)
+        stats = changes.counts()
+        if not changes:
+            if changes.hashes:
+                for name in changes.hashes:
+                    manifest.touch(directory, name)
+                manifest.save()
+            return stats
+
+        file_nodes = {}
+        for name in changes.added + changes.changed:
+            try:
+                documents = DocumentProcessor.file_documents(Path(directory) / name)
+                file_nodes[name] = self._embed_nodes(Settings.node_parser.get_nodes_from_documents(documents))
+                print(f"Processed: {name}")
+            except Exception as e:
+                print(f"Error processing {name}: {e}")
+
+        index = self._load_existing_store() if self._check_existing_store() else None
+        if index is not None and not changes.changed and not changes.removed:
+            self._append_nodes(index, [node for nodes in file_nodes.values() for node in nodes])
+            stats["rebuilt"] = 0
+        else:
+            dropped = manifest.node_ids(changes.changed + changes.removed) - manifest.node_ids(changes.unchanged)
+            kept = []
+            if index is not None:
+                kept_ids = set(index.index_struct.nodes_dict.values()) - dropped
+                kept = self._embed_nodes(index.docstore.get_nodes(list(kept_ids)))
+            nodes = list({node.node_id: node for node in kept + [n for ns in file_nodes.values() for n in ns]}.values())
+            if not nodes:
+                raise ValueError(f"No content left in store for website {self.store.website_id}")
+            self._persist(*self._new_index(nodes))
+            stats["rebuilt"] = 1
+
+        # _persist starts from an empty directory, so the manifest is written last
+        manifest.directory = directory
+        for name in changes.removed:
+            manifest.forget(name)
+        for name, nodes in file_nodes.items():
+            manifest.record(directory, name, changes.hashes[name], [node.node_id for node in nodes])
+        for name in changes.unchanged:
+            if name in changes.hashes:
+                manifest.touch(directory, name)
+        manifest.save()
+        stats["chunks"] = sum(len(nodes) for nodes in file_nodes.values())
+        print(f"Ingested documents for website {self.store.website_id}: {stats}")
+        return stats
+
+    def documents_directory(self) -> Optional[str]:
+        """Directory local documents were last ingested from, if any."""
+        return DocumentManifest.load(self.store.documents_manifest_file).directory
+
+    def _append_nodes(self, index: VectorStoreIndex, nodes: List[TextNode]) -> None:
+        """Add embedded nodes to a loaded index and write it back without a rebuild."""
+        stored = set(index.index_struct.nodes_dict.values())
+        nodes = [node for node in nodes if node.node_id not in stored]
+        keywords = self.load_keyword_index(index)
+        if nodes:
+            # The loaded vector store adds them the way the stored vectors were built
+            index.insert_nodes(nodes)
+            keywords.add_many((node.node_id, node.get_content()) for node in nodes)
+        self._write(index, index.vector_store.client, keywords, stored_meta=self._read_meta())
+
+    def _new_index(self, nodes: List[TextNode]):
+        """Build an in-memory index (and its FAISS index) over already embedded nodes."""
+        faiss_index = faiss.IndexFlat(Config.EMBEDDING_DIMENSION, ann.METRICS[Config.VECTOR_METRIC])
+        vector_store = faiss_vector_store(faiss_index, Config.VECTOR_METRIC == "cosine")
         storage_context = StorageContext.from_defaults(vector_store=vector_store)
         
-        index = VectorStoreIndex.from_documents(
-            documents,
-            storage_context=storage_context
+        index = VectorStoreIndex(
+            nodes,
+            storage_context=storage_context,
+            embed_model=self.embedding_model
         )
-        
-        # Save both FAISS and LlamaIndex storage
-        faiss.write_index(faiss_index, Config.FAISS_INDEX_FILE)
-        index.storage_context.persist(persist_dir=Config.STORAGE_DIR)
-        
+        return index, faiss_index
+
+    def _build_ann_index(self, index: VectorStoreIndex, faiss_index):
+        """Rebuild the flat staging index as the website's configured index type and storage.
+
+        Vectors keep their positions, so the docstore mapping from FAISS ids to
+        nodes stays valid. IVF indexes are trained on the website's own vectors.
+        """
+        index_type = self.store.index_type
+        if index_type == "auto":
+            index_type = ann.choose_index_type(
+                faiss_index.ntotal, Config.FAISS_FLAT_MAX_VECTORS, Config.FAISS_HNSW_MAX_VECTORS
+            )
+        if index_type == "flat" and Config.VECTOR_STORAGE == "float32":
+            return index, faiss_index
+
+        if ann.storage_for(Config.VECTOR_STORAGE, faiss_index.ntotal) != Config.VECTOR_STORAGE:
+            print(f"Warning: website {self.store.website_id} has {faiss_index.ntotal} vectors, fewer than the "
+                  f"{ann.PQ_MIN_VECTORS} pq storage needs to train; storing them as float16")
+        started = time.perf_counter()
+        # Staged vectors are already normalized when the metric is cosine
+        vectors = faiss_index.reconstruct_n(0, faiss_index.ntotal)
+        ann_index = ann.build_index(
+            vectors, index_type, Config.FAISS_NPROBE, Config.FAISS_EF_SEARCH, Config.FAISS_HNSW_M,
+            metric=ann.METRICS[Config.VECTOR_METRIC], storage=Config.VECTOR_STORAGE
+        )
+        storage_context = StorageContext.from_defaults(
+            docstore=index.docstore,
+            index_store=index.storage_context.index_store,
+            vector_store=faiss_vector_store(ann_index, Config.VECTOR_METRIC == "cosine"),
+        )
+        index = VectorStoreIndex(
+            index_struct=index.index_struct,
+            storage_context=storage_context,
+            embed_model=self.embedding_model
+        )
+        print(f"Built {index_type} index ({ann.describe(ann_index)}) over {ann_index.ntotal} vectors "
+              f"for website {self.store.website_id} in {time.perf_counter() - started:.2f}s")
+        return index, ann_index
+
+    def _persist(self, index: VectorStoreIndex, faiss_index, keywords: Optional[KeywordIndex] = None) -> VectorStoreIndex:
+        """Replace the website's files with the given index."""
+        index, faiss_index = self._build_ann_index(index, faiss_index)
+        self._cleanup_storage()
+        self._write(index, faiss_index, keywords)
         return index
 
+    def _write(
+        self,
+        index: VectorStoreIndex,
+        faiss_index,
+        keywords: Optional[KeywordIndex] = None,
+        stored_meta: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        # Save both FAISS and LlamaIndex storage
+        faiss.write_index(faiss_index, self.store.faiss_index_file)
+        index.storage_context.persist(persist_dir=self.store.storage_dir)
+        self._write_meta(faiss_index, stored_meta)
+        (keywords or self._keyword_index_from(index)).save(self.store.keyword_index_file)
+
+    def load_keyword_index(self, index: VectorStoreIndex) -> KeywordIndex:
+        """The store's keyword index, built from the docstore for stores that predate it."""
+        keywords = KeywordIndex.load(self.store.keyword_index_file)
+        if keywords is None:
+            keywords = self._keyword_index_from(index)
+            keywords.save(self.store.keyword_index_file)
+        return keywords
+
+    @staticmethod
+    def _keyword_index_from(index: VectorStoreIndex) -> KeywordIndex:
+        keywords = KeywordIndex()
+        keywords.add_many((node_id, node.get_content()) for node_id, node in index.docstore.docs.items())
+        return keywords
+
+    def _write_meta(self, faiss_index, stored_meta: Optional[Dict[str, Any]] = None) -> None:
+        """Record how the store's vectors were indexed, so queries treat them the same way.
+
+        stored_meta is the meta of a store that was appended to: its vectors keep
+        the metric and storage they were built with, whatever Config says now.
+        """
+        vectors = stored_meta or {
+            "metric": Config.VECTOR_METRIC,
+            "normalized": Config.VECTOR_METRIC == "cosine",
+            "storage": ann.storage_for(Config.VECTOR_STORAGE, faiss_index.ntotal),
+        }
+        meta = {
+            "index": ann.describe(faiss_index),
+            "metric": vectors.get("metric", "l2"),
+            "normalized": vectors.get("normalized", False),
+            "storage": vectors.get("storage", "float32"),
+            "vectors": faiss_index.ntotal,
+            "dimension": faiss_index.d,
+            "bytes_per_vector": round(os.path.getsize(self.store.faiss_index_file) / max(1, faiss_index.ntotal), 1),
+        }
+        with open(self.store.meta_file, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+    def _read_meta(self) -> Dict[str, Any]:
+        """Index metadata of the stored index; stores predating it are raw L2."""
+        try:
+            with open(self.store.meta_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"metric": "l2", "normalized": False}
+
+    def _embed_nodes(self, nodes: List[TextNode]) -> List[TextNode]:
+        """Attach embeddings to nodes, fetching only chunks not embedded before.
+
+        Nodes are identified by the hash of their embedded content, so chunks
+        that vanished from the site simply do not make it into the new index.
+        """
+        model_name = self.embedding_model.model_name
+        previous_ids = self._stored_node_ids()
+
+        unique_nodes = {}
+        for node in nodes:
+            text = node.get_content(metadata_mode=MetadataMode.EMBED)
+            node_hash = content_hash(text)
+            if node_hash not in unique_nodes:
+                node.id_ = node_hash
+                unique_nodes[node_hash] = (node, text)
+
+        chunk_store = chunk_embedding_store()
+        cached = chunk_store.get_many(model_name, list(unique_nodes))
+        missing = [h for h in unique_nodes if h not in cached]
+        if missing:
+            fetched = self.embedding_model.get_text_embedding_batch([unique_nodes[h][1] for h in missing])
+            fetched = dict(zip(missing, fetched))
+            chunk_store.put_many(model_name, fetched)
+            cached.update(fetched)
+
+        for node_hash, (node, _) in unique_nodes.items():
+            node.embedding = cached[node_hash]
+
+        self.last_build_stats = {
+            "chunks": len(unique_nodes),
+            "reused": len(unique_nodes) - len(missing),
+            "fetched": len(missing),
+            "removed": len(previous_ids - set(unique_nodes)),
+        }
+        print(f"Embeddings for website {self.store.website_id}: {self.last_build_stats}")
+        return [node for node, _ in unique_nodes.values()]
+
+    def _stored_node_ids(self) -> set:
+        """Node ids in the currently persisted docstore, if any."""
+        docstore_file = Path(self.store.storage_dir) / "docstore.json"
+        try:
+            with open(docstore_file, "r", encoding="utf-8") as f:
+                return set(json.load(f).get("docstore/data", {}))
+        except (OSError, ValueError):
+            return set()
+
     def _cleanup_storage(self):
         """Clean up existing storage."""
-        shutil.rmtree(Config.STORAGE_DIR, ignore_errors=True)
-        if os.path.exists(Config.FAISS_INDEX_FILE):
-            os.remove(Config.FAISS_INDEX_FILE)
+        shutil.rmtree(self.store.storage_dir, ignore_errors=True)
+        if os.path.exists(self.store.faiss_index_file):
+            os.remove(self.store.faiss_index_file)
         
         # create a new directory for the website
-        if not os.path.exists(Config.STORAGE_DIR):
-            os.makedirs(Config.STORAGE_DIR)
+        if not os.path.exists(self.store.storage_dir):
+            os.makedirs(self.store.storage_dir)
 
 class SearchEngine:
-    def __init__(self, index: VectorStoreIndex):
+    """Top-k retrieval straight from a website's vector and keyword indexes.
+
+    In hybrid mode the BM25 and vector rankings are fused by reciprocal
+    rank, so exact-term lookups (product names, SKUs, addresses) surface even
+    when the embedding misses them. If the query embedding fails or takes
+    longer than ``SEARCH_EMBED_TIMEOUT``, search answers from keywords alone
+    and skips embedding for ``SEARCH_EMBED_COOLDOWN`` seconds.
+
+    Results are dicts with the chunk ``content``, its ranking ``score``, the
+    cosine-style ``vector_score`` and BM25 ``keyword_score`` (None where a
+    ranking did not return the chunk), the docstore ``node_id`` and the
+    source ``url``, best first. No response synthesis happens here; callers
+    assemble the prompt themselves, e.g. with ``assemble_context``.
+    """
+    # Shared by all websites: they all embed queries through the same service
+    _embed_retry_at = 0.0
+    _embed_executor = ThreadPoolExecutor(max_workers=Config.EMBED_MAX_CONCURRENCY, thread_name_prefix="query-embed")
+
+    def __init__(self, index: VectorStoreIndex, keywords: Optional[KeywordIndex] = None, mode: str = Config.SEARCH_MODE):
         self.index = index
-        self.query_engine = index.as_query_engine(llm=None)
+        self.keywords = keywords
+        self.mode = mode if keywords is not None else "vector"
+        self.vector_store = index.vector_store
+        self.embed_model = index._embed_model
+        self.inner_product = index.vector_store.client.metric_type == faiss.METRIC_INNER_PRODUCT
 
-    def search(self, query: str, k: int = 3) -> List[str]:
+    def search(self, query: str, k: int = Config.SEARCH_TOP_K, min_score: float = Config.SEARCH_MIN_SCORE) -> List[Dict[str, Any]]:
         """Search for similar content."""
         try:
-            response = self.query_engine.query(query)
-            if hasattr(response, "response"):
-                return [response.response]
-            return response if isinstance(response, list) else [str(response)]
+            embedding = None
+            if self._use_vectors():
+                future = self._embed_executor.submit(self.embed_model.get_query_embedding, query)
+                embedding = self._embedded(future.result, query)
+            return self._retrieve(query, embedding, k, min_score)
+        except Exception as e:
+            print(f"Search error: {e}")
+            return []
+
+    async def asearch(self, query: str, k: int = Config.SEARCH_TOP_K, min_score: float = Config.SEARCH_MIN_SCORE) -> List[Dict[str, Any]]:
+        """Search for similar content without blocking the event loop on the query embedding."""
+        try:
+            embedding = None
+            if self._use_vectors():
+                task = asyncio.ensure_future(self.embed_model.aget_query_embedding(query))
+                embedding = await self._aembedded(task, query)
+            # FAISS, BM25 and docstore lookups are CPU work; keep them off the event loop
+            return await asyncio.to_thread(self._retrieve, query, embedding, k, min_score)
         except Exception as e:
             print(f"Search error: {e}")
             return []
 
+    def keyword_search(self, query: str, k: int = Config.SEARCH_TOP_K) -> List[Dict[str, Any]]:
+        """BM25-only search, for callers that cannot wait for a query embedding."""
+        if self.keywords is None:
+            return []
+        return self._retrieve(query, None, k, 0.0)
+
+    def _use_vectors(self) -> bool:
+        if self.mode == "keyword":
+            return False
+        # Vector-only search has nothing to fall back on, so it always tries
+        return self.mode == "vector" or SearchEngine.embedding_available()
+
+    @staticmethod
+    def embedding_available() -> bool:
+        return time.monotonic() >= SearchEngine._embed_retry_at
+
+    def _embedded(self, result, query: str) -> Optional[List[float]]:
+        if self.mode == "vector":
+            return result()
+        try:
+            return result(timeout=Config.SEARCH_EMBED_TIMEOUT)
+        except Exception as e:
+            self._embedding_failed(query, e)
+            return None
+
+    async def _aembedded(self, task: asyncio.Future, query: str) -> Optional[List[float]]:
+        if self.mode == "vector":
+            return await task
+        try:
+            # shield: a slow embedding still finishes and lands in the query cache
+            return await asyncio.wait_for(asyncio.shield(task), Config.SEARCH_EMBED_TIMEOUT)
+        except Exception as e:
+            # Nobody awaits the abandoned task; retrieve its outcome so errors are not reported as unhandled
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._embedding_failed(query, e)
+            return None
+
+    @staticmethod
+    def _embedding_failed(query: str, error: Exception) -> None:
+        SearchEngine._embed_retry_at = time.monotonic() + Config.SEARCH_EMBED_COOLDOWN
+        print(f"Query embedding unavailable ({type(error).__name__}: {error}), "
+              f"using keyword search for {Config.SEARCH_EMBED_COOLDOWN:.0f}s: {query!r}")
+
+    def _retrieve(self, query: str, embedding: Optional[List[float]], k: int, min_score: float) -> List[Dict[str, Any]]:
+        candidates = k if self.mode == "vector" else max(k, Config.SEARCH_CANDIDATES)
+        rankings = {}
+        if embedding is not None:
+            rankings["vector_score"] = self._vector_hits(embedding, candidates, min_score)
+        if self.mode != "vector":
+            rankings["keyword_score"] = self.keywords.search(query, candidates)
+
+        if len(rankings) == 1:
+            ranked = next(iter(rankings.values()))[:k]
+        else:
+            ranked = reciprocal_rank_fusion(list(rankings.values()), Config.RRF_K)[:k]
+
+        scores = {name: dict(hits) for name, hits in rankings.items()}
+        nodes = self.index.docstore.get_nodes([node_id for node_id, _ in ranked], raise_error=False)
+        return [
+            {
+                "content": node.get_content(),
+                "score": score,
+                "vector_score": scores.get("vector_score", {}).get(node_id),
+                "keyword_score": scores.get("keyword_score", {}).get(node_id),
+                "node_id": node_id,
+                "url": node.metadata.get("url") or node.metadata.get("file_path"),
+            }
+            for (node_id, score), node in zip(ranked, nodes)
+            if node is not None
+        ]
+
+    def _vector_hits(self, embedding: List[float], k: int, min_score: float) -> List[tuple]:
+        result = self.vector_store.query(VectorStoreQuery(query_embedding=embedding, similarity_top_k=k))
+        # FAISS returns positions; the index struct maps them to docstore node ids
+        nodes_dict = self.index.index_struct.nodes_dict
+        hits = [
+            (nodes_dict[position], self._score(distance))
+            for position, distance in zip(result.ids, result.similarities)
+            if position in nodes_dict
+        ]
+        return [(node_id, score) for node_id, score in hits if score >= min_score]
+
+    def _score(self, distance: float) -> float:
+        if self.inner_product:
+            return float(distance)
+        # Squared L2 between unit vectors (bge embeddings are normalized) is 2 - 2*cosine
+        return 1.0 - float(distance) / 2.0
+
+def reciprocal_rank_fusion(rankings: List[List[tuple]], k: int = 60) -> List[tuple]:
+    """Fuse ranked (id, score) lists by summing 1 / (k + rank); scores on different scales never mix."""
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, (node_id, _) in enumerate(ranking, start=1):
+            fused[node_id] = fused.get(node_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+def assemble_context(results: List[Dict[str, Any]], max_tokens: int = Config.CONTEXT_MAX_TOKENS) -> str:
+    """Join ranked chunks into prompt context, best first, stopping at the token budget."""
+    tokenizer = get_tokenizer()
+    parts = []
+    used = 0
+    for result in results:
+        tokens = len(tokenizer(result["content"]))
+        if parts and used + tokens > max_tokens:
+            break
+        parts.append(result["content"])
+        used += tokens
+    return "\n\n".join(parts)
+
 class EmbeddingService:
-    def scrape_website(self, id,url):
-        # if websites directory does not exist, create it
-            
-        Config.STORAGE_DIR = f"scrapper/websites/{id}/"
-        Config.DEFAULT_URL = url
-        Config.FAISS_INDEX_FILE = f"scrapper/websites/{id}/faiss_index.bin"
-        
-        vector_store_manager = VectorStoreManager()
-        index = vector_store_manager.create_or_load_store()
+    def __init__(self, embed_model: Optional[BaseEmbedding] = None):
+        self.embed_model = embed_model
+
+    def scrape_website(self, id,url, sublinks=0):
+        store = WebsiteStore(id, url, sublinks=sublinks)
+        with store.lock:
+            vector_store_manager = VectorStoreManager(store, self.embed_model)
+            documents_dir = vector_store_manager.documents_directory()
+            index = vector_store_manager.create_or_load_store(rebuild=True)
+            if documents_dir:
+                # The rebuild dropped previously ingested files; put them back from cached embeddings
+                vector_store_manager.ingest_documents(documents_dir)
+            INDEX_CACHE.invalidate(store.website_id)
+            ANSWER_CACHE.invalidate(store.website_id)
         return True
 
+    def ingest_documents(self, id, url, directory: str = Config.DOCUMENTS_DIR) -> Dict[str, int]:
+        """Index new and changed local files from directory into a website's store."""
+        store = WebsiteStore(id, url)
+        with store.lock:
+            stats = VectorStoreManager(store, self.embed_model).ingest_documents(directory)
+            INDEX_CACHE.invalidate(store.website_id)
+            ANSWER_CACHE.invalidate(store.website_id)
+        return stats
+
+    async def aquery_embedding(self, query: str) -> Optional[List[float]]:
+        """Query embedding for answer cache lookups, or None while the embedding service is failing."""
+        if not SearchEngine.embedding_available():
+            return None
+        embed_model = self.embed_model or default_embed_model()
+        try:
+            return await asyncio.wait_for(embed_model.aget_query_embedding(query), Config.SEARCH_EMBED_TIMEOUT)
+        except Exception as e:
+            SearchEngine._embedding_failed(query, e)
+            return None
+
+    @staticmethod
+    def index_version(id):
+        """Fingerprint of a website's stored index; changes whenever the store is rewritten."""
+        store = WebsiteStore(id)
+        return store_signature(store.faiss_index_file, store.storage_dir)
+
+    def preload(self, id, url) -> bool:
+        """Load a website's store into the index cache ahead of its first query."""
+        store = WebsiteStore(id, url)
+        if INDEX_CACHE.get(store.website_id, store.faiss_index_file, store.storage_dir) is not None:
+            return True
+        return self._get_search_engine(store) is not None
+
     def query(self, id,url,query):
-        Config.STORAGE_DIR = f"scrapper/websites/{id}/"
-        Config.DEFAULT_URL = url
-        Config.FAISS_INDEX_FILE = f"scrapper/websites/{id}/faiss_index.bin"
-        
-        processor = DocumentProcessor()
-        vector_store_manager = VectorStoreManager()
-        docs_dir = Path("documents")
-        if docs_dir.exists():
-            # Process all supported files in the documents directory
-            documents = []
-            for file_path in docs_dir.glob("*"):
-                if file_path.suffix in Config.SUPPORTED_FILE_TYPES:
-                    try:
-                        content = processor.read_file(file_path)
-                        chunks = processor.chunk_text(content)
-                        documents.extend([Document(text=chunk) for chunk in chunks])
-                        print(f"Processed: {file_path}")
-                    except Exception as e:
-                        print(f"Error processing {file_path}: {e}")
-            
-            if documents:
-                index = vector_store_manager.create_or_load_store(documents)
-            else:
-                index = vector_store_manager.create_or_load_store()
-        else:
-            index = vector_store_manager.create_or_load_store()
+        store = WebsiteStore(id, url)
+        search_engine = INDEX_CACHE.get(store.website_id, store.faiss_index_file, store.storage_dir)
+        if search_engine is None:
+            search_engine = self._get_search_engine(store)
+        if search_engine is None:
+            return
+        return search_engine.search(query)
+
+    async def aquery(self, id, url, query):
+        """Async variant of query; loading a store from disk happens in a worker thread."""
+        store = WebsiteStore(id, url)
+        search_engine = INDEX_CACHE.get(store.website_id, store.faiss_index_file, store.storage_dir)
+        if search_engine is None:
+            search_engine = await asyncio.to_thread(self._get_search_engine, store)
+        if search_engine is None:
+            return
+        return await search_engine.asearch(query)
+
+    def keyword_query(self, id, url, query):
+        """Keyword-only results from an already loaded store; empty if it is not loaded yet."""
+        store = WebsiteStore(id, url)
+        search_engine = INDEX_CACHE.get(store.website_id, store.faiss_index_file, store.storage_dir)
+        if search_engine is None:
+            return []
+        return search_engine.keyword_search(query)
+
+    def _get_search_engine(self, store: WebsiteStore) -> Optional["SearchEngine"]:
+        with store.lock:
+            # Another thread may have loaded the store while we waited
+            search_engine = INDEX_CACHE.get(store.website_id, store.faiss_index_file, store.storage_dir)
+            if search_engine is None:
+                search_engine = self._load_search_engine(store)
+            return search_engine
+
+    def _load_search_engine(self, store: WebsiteStore) -> Optional["SearchEngine"]:
+        vector_store_manager = VectorStoreManager(store, self.embed_model)
+        index = vector_store_manager.create_or_load_store()
 
         if not index:
             print("Failed to initialize index. Exiting...")
-            return
+            return None
 
         # Initialize search engine
-        search_engine = SearchEngine(index)
-        result = search_engine.search(query)
-        return result
-
+        keywords = vector_store_manager.load_keyword_index(index) if Config.SEARCH_MODE != "vector" else None
+        search_engine = SearchEngine(index, keywords)
+        INDEX_CACHE.put(store.website_id, search_engine, store.faiss_index_file, store.storage_dir)
+        return search_engine
@@ -13,21 +13,18 @@ import models
 from database import engine, SessionLocal
 import routes
 from typing import Any, Dict
-from pipecat.transports.services.helpers.daily_rest import DailyRESTHelper, DailyRoomParams
+from pipecat.transports.services.helpers.daily_rest import DailyRESTHelper, DailyRoomParams, DailyRoomProperties
 from contextlib import asynccontextmanager
 import aiohttp
-import subprocess
+import time
+from bot_pool import BotPool, PoolExhausted
+from bot_supervisor import BotSupervisor
 
 load_dotenv(override=True)
-bot_procs = {}
 daily_helpers = {}
+bot_pool = BotPool()
+supervisor = BotSupervisor(bot_pool, delete_room=lambda room_url: daily_helpers["rest"].delete_room_by_url(room_url))
 
-def cleanup():
-    for entry in bot_procs.values():
-        proc = entry[0]
-        proc.terminate()
-        proc.wait()
-        
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     aiohttp_session = aiohttp.ClientSession()
@@ -36,9 +33,10 @@ async def lifespan(app: FastAPI):
         daily_api_url=os.getenv("DAILY_API_URL", "https://api.daily.co/v1"),
         aiohttp_session=aiohttp_session,
     )
+    await supervisor.start()
     yield
+    await supervisor.shutdown()
     await aiohttp_session.close()
-    cleanup()
     
     
 # Init database
@@ -64,11 +62,14 @@ app.include_router(routes.router)
 
 
 async def create_room_and_token() -> tuple[str, str]:
-    room = await daily_helpers["rest"].create_room(DailyRoomParams())
+    # Rooms expire on their own shortly after the session limit, even if the server dies first
+    lifetime = supervisor.session_timeout + supervisor.stop_grace + 60
+    properties = DailyRoomProperties(exp=time.time() + lifetime, eject_at_room_exp=True)
+    room = await daily_helpers["rest"].create_room(DailyRoomParams(properties=properties))
     if not room.url:
         raise HTTPException(status_code=500, detail="Failed to create room")
 
-    token = await daily_helpers["rest"].get_token(room.url)
+    token = await daily_helpers["rest"].get_token(room.url, expiry_time=lifetime)
     if not token:
         raise HTTPException(status_code=500, detail=f"Failed to get token for room: {room.url}")
 
@@ -78,24 +79,35 @@ async def create_room_and_token() -> tuple[str, str]:
 @app.post("/connect/{id}")
 async def bot_connect(request: Request, id: int) -> Dict[Any, Any]:
     from crud import DatabaseHelper
+    from helpers import run_blocking
     db = DatabaseHelper()
-    website = db.get_single(models.Website, id)
+    website = await run_blocking(db.get_single, models.Website, id)
+    if supervisor.at_capacity():
+        supervisor.counters["rejected"] += 1
+        raise HTTPException(status_code=503, detail=f"All {supervisor.max_sessions} voice bots are busy")
     room_url, token = await create_room_and_token()
-    python_path = os.getenv("PYTHON_PATH", "python3")
     try:
-        bot_file = "voice_bot"
-        proc = subprocess.Popen(
-            [f"{python_path} -m {bot_file} -u {room_url} -t {token} -l {website.url} -i {id}"],
-            shell=True,
-            bufsize=1,
-            cwd=os.path.dirname(os.path.abspath(__file__)),
-        )
-        bot_procs[proc.pid] = (proc, room_url)
+        session = await supervisor.start_session(room_url, token, id, website.url)
+    except PoolExhausted as e:
+        supervisor.counters["rejected"] += 1
+        await daily_helpers["rest"].delete_room_by_url(room_url)
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
+        await daily_helpers["rest"].delete_room_by_url(room_url)
         raise HTTPException(status_code=500, detail=f"Failed to start subprocess: {e}")
+    print(f"Voice bot (pid {session.pid}) joining {room_url}")
     return {"room_url": room_url, "token": token}
 
 
+@app.get("/bots")
+async def bots() -> Dict[Any, Any]:
+    return supervisor.stats()
+
+
+@app.get("/bots/pool")
+async def bot_pool_stats() -> Dict[Any, Any]:
+    return bot_pool.stats()
+
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,6 +1,11 @@
 import asyncio
+import copy
+import json
 import os
+import re
 import sys
+import time
+from collections import deque
 from pathlib import Path
 
 import aiohttp
@@ -8,7 +13,15 @@ from dotenv import load_dotenv
 from loguru import logger
 
 from pipecat.audio.vad.silero import SileroVADAnalyzer
-from pipecat.frames.frames import Frame
+from pipecat.audio.vad.vad_analyzer import VADAnalyzer, VADParams
+from pipecat.frames.frames import (
+    CancelFrame,
+    EndFrame,
+    Frame,
+    InterimTranscriptionFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
 from pipecat.pipeline.pipeline import Pipeline
 from pipecat.pipeline.runner import PipelineRunner
 from pipecat.pipeline.task import PipelineParams, PipelineTask
@@ -21,7 +34,10 @@ from pipecat.services.google import GoogleLLMService, LLMSearchResponseFrame
 from pipecat.transports.services.daily import DailyParams, DailyTransport
 from pipecat.utils.text.markdown_text_filter import MarkdownTextFilter
 from pipecat.services.groq import GroqLLMService
-from scrapper.scrapper import EmbeddingService
+from metrics import LatencyHistogram, process_usage
+from scrapper.scrapper import EmbeddingService, assemble_context
+from voice_context import VOICE_HISTORY_SUMMARY_TOKENS, SessionContext, summarize_with_groq
+from voice_tracing import TurnTracer
 
 sys.path.append(str(Path(__file__).parent.parent))
 from runner import configure
@@ -30,70 +46,251 @@ load_dotenv(override=True)
 
 logger.remove(0)
 logger.add(sys.stderr, level="DEBUG")
+# Settings of a bot started for one call from the command line; workers keep a config per call
 CONFIG = {}
+# Longest a spoken question waits for retrieval before falling back to keyword search
+VOICE_RETRIEVAL_TIMEOUT = float(os.getenv("VOICE_RETRIEVAL_TIMEOUT", 1.5))
+# Words of a still-running turn before retrieval starts speculatively (and between
+# re-queries on interim transcripts); 0 turns speculation off
+VOICE_SPECULATION_MIN_WORDS = int(os.getenv("VOICE_SPECULATION_MIN_WORDS", 3))
+# Calls one worker process hosts at once; overridden by --sessions
+BOT_WORKER_SESSIONS = int(os.getenv("BOT_WORKER_SESSIONS", 1))
 
 class QueryProcessor(FrameProcessor):
-    def __init__(self, embedding_service, context_aggregator, llm):
+    """Looks up website context for each user turn and hands it to the LLM.
+
+    A turn runs from UserStartedSpeakingFrame to UserStoppedSpeakingFrame
+    (VAD); its final transcripts are collected as they arrive, and a final
+    that arrives after VAD closed the turn ends it. Without VAD frames a
+    phrase ends at ?, ! or . or "stop speaking", as before.
+
+    While the user is still talking, final and interim transcripts start
+    speculative retrieval; if the turn ends with the same words, that result
+    is reused, so retrieval mostly overlaps with speech. Retrieval runs in a
+    task beside the pipeline, so nothing upstream waits for it. Frames this
+    processor sends on keep their order, though: the frame that ended the
+    turn waits for its answer, and frames arriving meanwhile (e.g. the
+    caller starting the next turn) queue behind it. Retrieval that
+    takes longer than VOICE_RETRIEVAL_TIMEOUT falls back to keyword search,
+    or to no context.
+
+    Retrieved context replaces the previous turn's in the call's
+    SessionContext. With VAD, the user context aggregator downstream adds
+    the turn to the same context and calls the LLM once the held frame
+    reaches it; without VAD this processor adds the turn and pushes the
+    context frame itself.
+
+    config is the call's session config; its website_id and website_url
+    pick the index to search.
+    """
+
+    def __init__(self, embedding_service, session_context, context_aggregator, config, tracer=None):
         super().__init__()
         self.embedding_service = embedding_service
+        self.config = config
+        self.session_context = session_context
         self.context_aggregator = context_aggregator
+        self.tracer = tracer
         self.processed_frames = set()
-        self.llm = llm
-        self.current_text_buffer = []
         self.last_processed_text = None
         self.question_markers = {"?", "!", "."}
-        
+        self.retrieval_latency = LatencyHistogram()
+        # From the end of the user's turn to the LLM request carrying its context
+        self.response_latency = LatencyHistogram()
+        self.speculation = {"started": 0, "reused": 0, "discarded": 0}
+        self._turns = set()
+        # Current turn: final transcript segments, their word count and the latest interim
+        self._finals = []
+        self._final_words = 0
+        self._interim = ""
+        self._speaking = False
+        self._vad = False
+        self._stopped_at = None
+        # (normalized text, task, start time) of the latest speculative retrieval, and its word count
+        self._speculation = None
+        self._speculated_words = 0
+        # (answer task or None, frame, direction) waiting to go downstream, in order, and the task sending them
+        self._outbox = deque()
+        self._sender = None
+
     async def process_frame(self, frame: Frame, direction: FrameDirection):
         await super().process_frame(frame, direction)
-        
-        if hasattr(frame, "text") and frame.text.strip():
-            current_text = frame.text.strip()
-            self.current_text_buffer.append(current_text)
-            complete_text = " ".join(self.current_text_buffer)
-            if (any(complete_text.endswith(marker) for marker in self.question_markers) or 
-                "stop speaking" in complete_text.lower()):
-                clean_text = complete_text.replace("stop speaking", "").strip()
-                if clean_text != self.last_processed_text and clean_text:
-                    print(f"Processing complete phrase: {clean_text}")
-                    
-                    search_results = self.embedding_service.query(
-                        CONFIG["website_id"], 
-                        CONFIG["website_url"], 
-                        clean_text
-                    )
-                    
-                    print(f"QueryProcessor: Retrieved Search Results -> {search_results}")
-
-                    if isinstance(search_results, list):
-                        if all(isinstance(item, dict) for item in search_results):
-                            retrieved_context = "\n".join([doc.get("content", "") for doc in search_results])
-                        elif all(isinstance(item, str) for item in search_results):
-                            retrieved_context = "\n".join(search_results)
-                        else:
-                            retrieved_context = "No relevant context found."
-                    else:
-                        retrieved_context = "No relevant context found."
-
-                    new_context = OpenAILLMContext([
-                        {
-                            "role": "system",
-                            "content": f"Use the following context to answer questions:\n{retrieved_context}"
-                        },
-                        {
-                            "role": "user",
-                            "content": clean_text
-                        }
-                    ])
-                    
-                    self.context_aggregator = self.llm.create_context_aggregator(new_context)
-                    context_frame = self.context_aggregator.user().get_context_frame()
-                    await self.push_frame(context_frame)
-                    self.last_processed_text = clean_text
-                self.current_text_buffer = []
-                
-        await self.push_frame(frame)
+
+        if isinstance(frame, (EndFrame, CancelFrame)):
+            for turn in self._turns:
+                turn.cancel()
+            if isinstance(frame, CancelFrame) and self._sender is not None:
+                # Nothing queued will be delivered once the pipeline is cancelled
+                self._sender.cancel()
+                self._outbox.clear()
+            self._discard_speculation()
+            await self.session_context.close()
+            logger.info(f"QueryProcessor latency: retrieval {self.retrieval_latency.snapshot()}, "
+                        f"end of turn to LLM {self.response_latency.snapshot()}, speculation {self.speculation}, "
+                        f"context {self.session_context.stats()}")
+            if self.tracer is not None:
+                await self.tracer.close()
+                logger.info(f"Voice turn stages: {self.tracer.summary()}")
+        elif isinstance(frame, UserStartedSpeakingFrame):
+            self._vad = self._speaking = True
+            self._stopped_at = None
+        elif isinstance(frame, UserStoppedSpeakingFrame):
+            self._vad, self._speaking = True, False
+            self._stopped_at = time.perf_counter()
+            if self._finals and await self._end_turn(frame, direction):
+                return
+        elif isinstance(frame, InterimTranscriptionFrame):
+            self._interim = frame.text.strip()
+            if self._speaking:
+                self._speculate_interim()
+        elif hasattr(frame, "text") and frame.text.strip():
+            text = frame.text.strip()
+            self._finals.append(text)
+            self._final_words += len(text.split())
+            self._interim = ""
+            if self._vad and self._speaking:
+                # What the turn would be if VAD stopped now
+                self._speculate(self._finals_text(), self._final_words)
+            elif (self._vad or self._phrase_complete()) and await self._end_turn(frame, direction):
+                # VAD already closed the turn, or there is no VAD and the phrase is complete
+                return
+
+        await self._forward(frame, direction)
+
+    async def _forward(self, frame, direction, turn=None):
+        """Push frame downstream, or queue it behind a turn still being answered; turn holds it back until done."""
+        if (self._sender is None and turn is None) or isinstance(frame, CancelFrame):
+            await self.push_frame(frame, direction)
+            return
+        self._outbox.append((turn, frame, direction))
+        if self._sender is None:
+            self._sender = asyncio.create_task(self._send_queued())
+
+    async def _send_queued(self):
+        try:
+            while self._outbox:
+                turn, frame, direction = self._outbox[0]
+                if turn is not None:
+                    # A cancelled or failed answer still releases its frame
+                    await asyncio.wait({turn})
+                self._outbox.popleft()
+                await self.push_frame(frame, direction)
+        finally:
+            self._sender = None
+
+    def _finals_text(self):
+        return " ".join(self._finals)
+
+    def _phrase_complete(self):
+        last = self._finals[-1]
+        return any(last.endswith(marker) for marker in self.question_markers) or "stop speaking" in last.lower()
+
+    def _speculate_interim(self):
+        words = self._final_words + len(self._interim.split())
+        # Interims change every few hundred ms; only re-query once a few new words have arrived
+        if words < self._speculated_words + VOICE_SPECULATION_MIN_WORDS:
+            return
+        self._speculate(f"{self._finals_text()} {self._interim}".strip(), words)
+
+    def _speculate(self, text, words):
+        if not VOICE_SPECULATION_MIN_WORDS or words < VOICE_SPECULATION_MIN_WORDS:
+            return
+        key = _normalize(text)
+        if self._speculation and self._speculation[0] == key:
+            return
+        self._discard_speculation()
+        self._speculation = (key, asyncio.create_task(self._timed_search(text)), time.perf_counter())
+        self._speculated_words = words
+        self.speculation["started"] += 1
+
+    def _discard_speculation(self):
+        if self._speculation:
+            self._speculation[1].cancel()
+            self.speculation["discarded"] += 1
+        self._speculation = None
+        self._speculated_words = 0
+
+    async def _end_turn(self, frame, direction):
+        """Start answering the collected turn; True if frame now waits for the answer."""
+        clean_text = self._finals_text().replace("stop speaking", "").strip()
+        ended_at = self._stopped_at or time.perf_counter()
+        self._finals, self._final_words, self._interim = [], 0, ""
+        if not clean_text or clean_text == self.last_processed_text:
+            self._discard_speculation()
+            return False
+
+        print(f"Processing complete phrase: {clean_text}")
+        self.last_processed_text = clean_text
+        search = None
+        search_started = time.perf_counter()
+        if self._speculation and self._speculation[0] == _normalize(clean_text):
+            _, search, search_started = self._speculation
+            self._speculation = None
+            self._speculated_words = 0
+            self.speculation["reused"] += 1
+        else:
+            self._discard_speculation()
+        turn = asyncio.create_task(self._answer(clean_text, ended_at, search, search_started))
+        self._turns.add(turn)
+        turn.add_done_callback(self._turns.discard)
+        await self._forward(frame, direction, turn)
+        return True
+
+    async def _answer(self, clean_text, ended_at, search=None, search_started=None):
+        """Retrieve context for a turn and set it up for the LLM; the turn's last frame is sent after this."""
+        try:
+            self._trace("retrieval_start", search_started)
+            search_results, search_finished = await (search or self._timed_search(clean_text))
+            # When the search finished, not when this turn got to it: a speculative one may be long done
+            self._trace("retrieval_end", search_finished)
+            print(f"QueryProcessor: Retrieved Search Results -> {search_results}")
+
+            self.session_context.set_retrieved(assemble_context(search_results or []))
+            if self._vad:
+                # The user aggregator downstream adds the turn and asks the LLM once it gets frame
+                self.session_context.trim()
+                tokens = self.session_context.record_turn(clean_text)
+            else:
+                self.session_context.add_user_message(clean_text)
+                self.session_context.trim()
+                tokens = self.session_context.record_turn()
+                await self.push_frame(self.context_aggregator.user().get_context_frame())
+            logger.debug(f"Prompt for turn {self.session_context.turns}: {tokens} tokens")
+            latency = time.perf_counter() - ended_at
+            self.response_latency.observe(latency)
+            logger.debug(f"End of utterance to LLM request: {latency * 1000:.0f} ms")
+        except Exception as e:
+            logger.exception(f"Answering {clean_text!r} failed: {e}")
+
+    def _trace(self, name, at=None):
+        if self.tracer is not None:
+            self.tracer.mark(name, at)
+
+    async def _timed_search(self, text):
+        """Search results with the time the search completed."""
+        results = await self._search(text)
+        return results, time.perf_counter()
+
+    async def _search(self, text):
+        started = time.perf_counter()
+        try:
+            return await asyncio.wait_for(
+                self.embedding_service.aquery(self.config["website_id"], self.config["website_url"], text),
+                VOICE_RETRIEVAL_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Retrieval took over {VOICE_RETRIEVAL_TIMEOUT}s, using keyword search: {text!r}")
+            return await asyncio.to_thread(
+                self.embedding_service.keyword_query, self.config["website_id"], self.config["website_url"], text
+            )
+        finally:
+            self.retrieval_latency.observe(time.perf_counter() - started)
 
         
+def _normalize(text):
+    """Case and punctuation-insensitive form of a transcript, for matching speculative queries."""
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
 class LLMSearchLoggerProcessor(FrameProcessor):
     async def process_frame(self, frame: Frame, direction: FrameDirection):
         await super().process_frame(frame, direction)
@@ -101,84 +298,328 @@ class LLMSearchLoggerProcessor(FrameProcessor):
             print(f"LLMSearchLoggerProcessor: {frame}")
         await self.push_frame(frame)
 
+class SharedSileroVADAnalyzer(SileroVADAnalyzer):
+    """Silero VAD reusing the ONNX model another analyzer already loaded.
+
+    The ONNX session holding the weights is read-only and can run from
+    several threads, so the calls in a process share it. Each analyzer
+    gets its own copy of the model's recurrent state and its own VAD
+    buffers, so calls do not disturb each other's speech detection.
+    """
+
+    def __init__(self, loaded, params=None):
+        VADAnalyzer.__init__(self, sample_rate=None, num_channels=1, params=params or VADParams())
+        self._model = copy.copy(loaded._model)
+        self._model.reset_states()
+        self._last_reset_time = 0
+
+class SharedClientGroqLLMService(GroqLLMService):
+    """Groq service with one HTTP client per API key and base URL, so calls in a process share its connections."""
+
+    _clients = {}
+
+    def create_client(self, api_key=None, base_url=None, **kwargs):
+        key = (api_key, base_url)
+        if key not in self._clients:
+            self._clients[key] = super().create_client(api_key=api_key, base_url=base_url, **kwargs)
+        return self._clients[key]
+
+async def build_task(config, vad_analyzer=None, on_joined=None, embedding_service=None):
+    """Voice pipeline for the call described by config (room_url, token, website_id, website_url).
+
+    on_joined is awaited once the bot is in the room.
+    """
+    transport = DailyTransport(
+        config["room_url"],
+        config["token"],
+        "Voice Assistant!",
+        DailyParams(
+            audio_out_enabled=True,
+            vad_enabled=True,
+            vad_analyzer=vad_analyzer or SileroVADAnalyzer(),
+            vad_audio_passthrough=True,
+        ),
+    )
+
+    stt = DeepgramSTTService(api_key=os.getenv("DEEPGRAM_API_KEY"))
+    tts = CartesiaTTSService(
+        api_key=os.getenv("CARTESIA_API_KEY"),
+        voice_id="79a125e8-cd45-4c13-8a67-188112f4dd22",
+        text_filter=MarkdownTextFilter(),
+    )
+
+    llm = SharedClientGroqLLMService(
+        api_key=os.getenv("GROQ_API_KEY"),
+        model="llama-3.1-8b-instant"
+    )
+
+    task, context_aggregator = build_pipeline_task(
+        transport,
+        llm,
+        config,
+        stt=stt,
+        #tts=tts,
+        tracer=TurnTracer(config["room_url"], attributes={"website_id": config.get("website_id")}),
+        embedding_service=embedding_service,
+    )
+
+    @transport.event_handler("on_joined")
+    async def on_transport_joined(transport, data):
+        if on_joined:
+            await on_joined()
+
+    @transport.event_handler("on_first_participant_joined")
+    async def on_first_participant_joined(transport, participant):
+        await task.queue_frames([context_aggregator.user().get_context_frame()])
+
+    @transport.event_handler("on_participant_left")
+    async def on_participant_left(transport, participant, reason):
+        print(f"Participant left: {participant}")
+        await task.cancel()
+
+    return task
+
+def build_pipeline_task(transport, llm, config, stt=None, tts=None, tracer=None, embedding_service=None):
+    """Pipeline task from transport.input() to transport.output() around the given services.
+
+    Each call gets a fresh LLM context, SessionContext and QueryProcessor
+    answering from the website in config. stt and tts may be left out, e.g.
+    when the transport already produces transcriptions
+    (benchmarks/voice_pipeline.py). Returns the task and the context
+    aggregator.
+    """
+    context = OpenAILLMContext(
+        [
+            {"role": "system", "content": "You are a helpful assistant, only provide information provided in context, if query is not readable or understandable, say you don't know about this query."}
+        ],
+    )
+    
+    context_aggregator = llm.create_context_aggregator(context)
+    summarizer = summarize_with_groq if VOICE_HISTORY_SUMMARY_TOKENS else None
+    session_context = SessionContext(context, summarizer=summarizer)
+    query_processor = QueryProcessor(
+        embedding_service or EmbeddingService(), session_context, context_aggregator, config, tracer
+    )
+    
+    llm_search_logger = LLMSearchLoggerProcessor()
+    rtvi = RTVIProcessor(config=RTVIConfig(config=[]))
+    processors = [
+        transport.input(),
+        stt,
+        rtvi,
+        query_processor,
+        context_aggregator.user(),
+        llm,
+        llm_search_logger,
+        tts,
+        transport.output(),
+        context_aggregator.assistant(),
+    ]
+    pipeline = Pipeline([processor for processor in processors if processor is not None])
+
+    observers = [rtvi.observer()]
+    if tracer is not None:
+        observers.append(tracer)
+    task = PipelineTask(
+        pipeline,
+        PipelineParams(
+            allow_interruptions=True,
+            observers=observers,
+        ),
+    )
+
+    @rtvi.event_handler("on_client_ready")
+    async def on_client_ready(rtvi):
+        await rtvi.set_bot_ready()
+
+    return task, context_aggregator
+
 async def main():
     
     async with aiohttp.ClientSession() as session:
         (room_url, token) = await configure(session)
-        transport = DailyTransport(
-            room_url,
-            token,
-            "Voice Assistant!",
-            DailyParams(
-                audio_out_enabled=True,
-                vad_enabled=True,
-                vad_analyzer=SileroVADAnalyzer(),
-                vad_audio_passthrough=True,
-            ),
-        )
+        task = await build_task(dict(CONFIG, room_url=room_url, token=token))
+        runner = PipelineRunner()
+        await runner.run(task)
 
-        stt = DeepgramSTTService(api_key=os.getenv("DEEPGRAM_API_KEY"))
-        tts = CartesiaTTSService(
-            api_key=os.getenv("CARTESIA_API_KEY"),
-            voice_id="79a125e8-cd45-4c13-8a67-188112f4dd22",
-            text_filter=MarkdownTextFilter(),
-        )
+class WorkerChannel:
+    """JSON-lines channel to the bot pool in server.py.
 
-        llm = GroqLLMService(
-            api_key=os.getenv("GROQ_API_KEY"),
-            model="llama-3.1-8b-instant"
-        )
+    Events go out on the process's original stdout, which is then pointed at
+    stderr so prints and native library output cannot corrupt the stream.
+    Commands are read from stdin.
+    """
 
-        context = OpenAILLMContext(
-            [
-                {"role": "system", "content": "You are a helpful assistant, only provide information provided in context, if query is not readable or understandable, say you don't know about this query."}
-            ],
-        )
-        
-        context_aggregator = llm.create_context_aggregator(context)
-        embedding_service = EmbeddingService()
-        query_processor = QueryProcessor(embedding_service,context_aggregator,llm)
-        
-        llm_search_logger = LLMSearchLoggerProcessor()
-        rtvi = RTVIProcessor(config=RTVIConfig(config=[]))
-        pipeline = Pipeline(
-            [
-                transport.input(),
-                stt,
-                rtvi,
-                query_processor,
-                context_aggregator.user(),
-                llm,
-                llm_search_logger,
-                #tts,
-                transport.output(),
-                context_aggregator.assistant(),
-            ]
-        )
+    def __init__(self):
+        self._out = os.fdopen(os.dup(sys.stdout.fileno()), "w", buffering=1)
+        os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+        sys.stdout = sys.stderr
+        self._reader = None
+        self._pending = None
+
+    def send(self, event, **fields):
+        self._out.write(json.dumps({"event": event, **fields}) + "\n")
+        self._out.flush()
+
+    async def open(self):
+        loop = asyncio.get_running_loop()
+        self._reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(self._reader), sys.stdin)
+
+    def next_command(self):
+        """Future for the next command; stays pending across calls until one arrives."""
+        if self._pending is None:
+            self._pending = asyncio.ensure_future(self._read_command())
+        return self._pending
+
+    async def _read_command(self):
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                # The pool closed our stdin or went away
+                return {"command": "stop"}
+            try:
+                return json.loads(line)
+            except ValueError:
+                self.send("error", error=f"Unreadable command: {line!r}")
+
+    def consume(self):
+        command, self._pending = self._pending.result(), None
+        return command
+
+class SessionRunner:
+    """Runs up to max_sessions calls at once in this process.
+
+    Each call has its own config, pipeline, LLM context and VAD state.
+    Read-only resources are loaded once and shared: the Silero model, the
+    embedding client and its connection pool, website indexes (through
+    INDEX_CACHE) and the Groq HTTP client. stats() reports process memory
+    against the baseline taken before the first call, averaged over the
+    calls in progress.
+    """
+
+    def __init__(self, max_sessions=BOT_WORKER_SESSIONS, on_joined=None, on_ended=None):
+        self.max_sessions = max_sessions
+        # Awaited with the call's config, and for on_ended the error that stopped it, if any
+        self.on_joined = on_joined
+        self.on_ended = on_ended
+        # Loading the Silero model is the slow part of starting a bot; do it once
+        self.vad_analyzer = SileroVADAnalyzer()
+        self.embedding_service = EmbeddingService()
+        self.sessions = {}
+        self.served = 0
+        self._baseline = process_usage(os.getpid())
 
-        task = PipelineTask(
-            pipeline,
-            PipelineParams(
-                allow_interruptions=True,
-                observers=[rtvi.observer()],
-            ),
+    @property
+    def full(self):
+        return len(self.sessions) >= self.max_sessions
+
+    async def start(self, config):
+        """Start the call in config["room_url"] without waiting for it; raises RuntimeError when full."""
+        room_url = config["room_url"]
+        if self.full:
+            raise RuntimeError(f"Already running {self.max_sessions} calls")
+        if room_url in self.sessions:
+            raise RuntimeError(f"Already in {room_url}")
+        # Load the website's index while the bot joins, not on the first question
+        preload = asyncio.create_task(
+            asyncio.to_thread(self.embedding_service.preload, config["website_id"], config["website_url"])
         )
+        try:
+            task = await build_task(
+                config,
+                SharedSileroVADAnalyzer(self.vad_analyzer),
+                on_joined=lambda: self._joined(config),
+                embedding_service=self.embedding_service,
+            )
+        except Exception:
+            await asyncio.gather(preload, return_exceptions=True)
+            raise
+        self.sessions[room_url] = {"config": config, "task": task, "started_at": time.time()}
+        self.sessions[room_url]["run"] = asyncio.create_task(self._run(config, task, preload))
+        self.served += 1
 
-        @rtvi.event_handler("on_client_ready")
-        async def on_client_ready(rtvi):
-            await rtvi.set_bot_ready()
+    async def end(self, room_url=None):
+        """Cancel the call in room_url, or every call."""
+        for url, session in list(self.sessions.items()):
+            if room_url is None or url == room_url:
+                await session["task"].cancel()
 
-        @transport.event_handler("on_first_participant_joined")
-        async def on_first_participant_joined(transport, participant):
-            await task.queue_frames([context_aggregator.user().get_context_frame()])
+    async def close(self):
+        await self.end()
+        await asyncio.gather(*(session["run"] for session in list(self.sessions.values())), return_exceptions=True)
 
-        @transport.event_handler("on_participant_left")
-        async def on_participant_left(transport, participant, reason):
-            print(f"Participant left: {participant}")
-            await task.cancel()
+    def stats(self):
+        usage = process_usage(os.getpid()) or {}
+        rss = usage.get("rss_mb")
+        baseline = (self._baseline or {}).get("rss_mb")
+        active = len(self.sessions)
+        per_session = None
+        if active and rss is not None and baseline is not None:
+            per_session = round((rss - baseline) / active, 1)
+        return {
+            "active": active,
+            "max_sessions": self.max_sessions,
+            "served": self.served,
+            "rss_mb": rss,
+            "baseline_rss_mb": baseline,
+            "rss_mb_per_session": per_session,
+            "threads": usage.get("threads"),
+        }
 
-        runner = PipelineRunner()
-        await runner.run(task)
+    async def _joined(self, config):
+        if self.on_joined:
+            await self.on_joined(config)
+
+    async def _run(self, config, task, preload):
+        error = None
+        try:
+            await PipelineRunner(handle_sigint=False).run(task)
+        except Exception as e:
+            logger.exception(f"Session in {config['room_url']} failed")
+            error = str(e)
+        finally:
+            await asyncio.gather(preload, return_exceptions=True)
+        # Measured while the call still counts as active
+        logger.info(f"Call in {config['room_url']} ended; process {self.stats()}")
+        self.sessions.pop(config["room_url"], None)
+        if self.on_ended:
+            await self.on_ended(config, error)
+
+async def worker(max_sessions=BOT_WORKER_SESSIONS):
+    """Pre-warmed bot: load models once, then serve up to max_sessions of the calls the pool hands over at a time."""
+    channel = WorkerChannel()
+    await channel.open()
+
+    async def joined(config):
+        channel.send("joined", room_url=config["room_url"], usage=runner.stats())
+
+    async def ended(config, error):
+        if error:
+            channel.send("error", error=error, room_url=config["room_url"])
+        channel.send("ended", room_url=config["room_url"], usage=runner.stats())
+
+    runner = SessionRunner(max_sessions, on_joined=joined, on_ended=ended)
+    channel.send("ready", pid=os.getpid(), sessions=max_sessions)
+
+    while True:
+        await channel.next_command()
+        command = channel.consume()
+        action = command.get("command")
+        if action == "stop":
+            break
+        if action == "start":
+            config = {key: command[key] for key in ("room_url", "token", "website_id", "website_url")}
+            try:
+                await runner.start(config)
+            except Exception as e:
+                logger.exception(f"Starting the call in {config['room_url']} failed")
+                channel.send("error", error=str(e), room_url=config["room_url"])
+                channel.send("ended", room_url=config["room_url"], usage=runner.stats())
+        elif action == "end":
+            # A bare "end" ends every call
+            await runner.end(command.get("room_url"))
+    await runner.close()
 
 def parse_args():
     args = sys.argv 
@@ -189,6 +630,10 @@ def parse_args():
     CONFIG["website_id"] = args[args.index("-i") + 1] if "-i" in args else None
     
 if __name__ == "__main__":
-    parse_args()
+    if "--worker" in sys.argv:
+        args = sys.argv
+        asyncio.run(worker(int(args[args.index("--sessions") + 1]) if "--sessions" in args else BOT_WORKER_SESSIONS))
+    else:
+        parse_args()
 
-    asyncio.run(main())
+        asyncio.run(main())
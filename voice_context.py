@@ -0,0 +1,161 @@
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from llama_index.core.utils import get_tokenizer
+
+# Token budget for the conversation history kept in a call's LLM context
+VOICE_HISTORY_MAX_TOKENS = int(os.getenv("VOICE_HISTORY_MAX_TOKENS", 2000))
+# Length limit of the running summary of trimmed history; 0 drops old turns unsummarized
+VOICE_HISTORY_SUMMARY_TOKENS = int(os.getenv("VOICE_HISTORY_SUMMARY_TOKENS", 0))
+
+RETRIEVAL_PREFIX = "Use the following context to answer questions:\n"
+SUMMARY_PREFIX = "Summary of the conversation so far:\n"
+NO_CONTEXT = "No relevant context found."
+
+# Per-message overhead of the chat format (role, separators), as OpenAI counts it
+_MESSAGE_TOKENS = 4
+
+Summarizer = Callable[[str, List[Dict[str, Any]]], Awaitable[str]]
+
+
+class SessionContext:
+    """One voice call's LLM context, kept for the whole call.
+
+    The wrapped OpenAILLMContext is shared with the pipeline's context
+    aggregators, which append the user and assistant turns. Its messages
+    are laid out as the system prompt, a system slot holding the current
+    turn's retrieved context (replaced every turn), an optional summary of
+    trimmed history, then the history itself. ``trim`` drops the oldest
+    history beyond ``max_history_tokens``; with a summarizer, dropped turns
+    are folded into the summary in the background.
+    """
+
+    def __init__(
+        self,
+        context,
+        max_history_tokens: int = VOICE_HISTORY_MAX_TOKENS,
+        summarizer: Optional[Summarizer] = None,
+    ):
+        self.context = context
+        self.max_history_tokens = max_history_tokens
+        self.summarizer = summarizer
+        self._tokenizer = get_tokenizer()
+        self._slot = {"role": "system", "content": RETRIEVAL_PREFIX + NO_CONTEXT}
+        self._summary: Optional[Dict[str, Any]] = None
+        self._unsummarized: List[Dict[str, Any]] = []
+        self._summarizing: Optional[asyncio.Task] = None
+        messages = context.get_messages()
+        messages.insert(1 if messages and messages[0]["role"] == "system" else 0, self._slot)
+        context.set_messages(messages)
+        self.turns = 0
+        self.trimmed_messages = 0
+        self.summaries = 0
+        self.last_prompt_tokens = 0
+        self.max_prompt_tokens = 0
+        self._total_prompt_tokens = 0
+
+    def set_retrieved(self, text: str) -> None:
+        """Replace the retrieved context the next LLM request sees."""
+        self._slot["content"] = RETRIEVAL_PREFIX + (text or NO_CONTEXT)
+
+    def add_user_message(self, text: str) -> None:
+        self.context.add_message({"role": "user", "content": text})
+
+    def trim(self) -> int:
+        """Drop the oldest history beyond the token budget, keeping the latest message; returns how many."""
+        messages = self.context.get_messages()
+        start = self._history_start(messages)
+        history = messages[start:]
+        used = sum(self._tokens(message) for message in history)
+        dropped = 0
+        while dropped < len(history) - 1 and used > self.max_history_tokens:
+            used -= self._tokens(history[dropped])
+            dropped += 1
+        if not dropped:
+            return 0
+        self.context.set_messages(messages[:start] + history[dropped:])
+        self.trimmed_messages += dropped
+        if self.summarizer is not None:
+            self._unsummarized.extend(history[:dropped])
+            if self._summarizing is None or self._summarizing.done():
+                self._summarizing = asyncio.create_task(self._summarize())
+        return dropped
+
+    def record_turn(self, pending_text: str = "") -> int:
+        """Count the prompt the LLM is about to get, plus a user message not yet added to it."""
+        tokens = sum(self._tokens(message) for message in self.context.get_messages())
+        if pending_text:
+            tokens += self._tokens({"role": "user", "content": pending_text})
+        self.turns += 1
+        self.last_prompt_tokens = tokens
+        self.max_prompt_tokens = max(self.max_prompt_tokens, tokens)
+        self._total_prompt_tokens += tokens
+        return tokens
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "turns": self.turns,
+            "messages": len(self.context.get_messages()),
+            "last_prompt_tokens": self.last_prompt_tokens,
+            "max_prompt_tokens": self.max_prompt_tokens,
+            "mean_prompt_tokens": round(self._total_prompt_tokens / self.turns) if self.turns else 0,
+            "trimmed_messages": self.trimmed_messages,
+            "summaries": self.summaries,
+        }
+
+    async def close(self) -> None:
+        if self._summarizing is not None:
+            self._summarizing.cancel()
+
+    def _history_start(self, messages: List[Dict[str, Any]]) -> int:
+        start = 0
+        for i, message in enumerate(messages):
+            if message is self._slot or message is self._summary:
+                start = i + 1
+        return start
+
+    def _tokens(self, message: Dict[str, Any]) -> int:
+        content = message.get("content")
+        text = content if isinstance(content, str) else str(content or "")
+        return len(self._tokenizer(text)) + _MESSAGE_TOKENS
+
+    async def _summarize(self) -> None:
+        while self._unsummarized:
+            dropped, self._unsummarized = self._unsummarized, []
+            previous = self._summary["content"][len(SUMMARY_PREFIX):] if self._summary else ""
+            try:
+                summary = await self.summarizer(previous, dropped)
+            except Exception as e:
+                print(f"Summarizing voice history failed, dropping {len(dropped)} messages: {e}")
+                continue
+            self._set_summary(summary)
+            self.summaries += 1
+
+    def _set_summary(self, summary: str) -> None:
+        messages = self.context.get_messages()
+        if self._summary is None:
+            self._summary = {"role": "system", "content": ""}
+            position = next(i for i, message in enumerate(messages) if message is self._slot) + 1
+            messages.insert(position, self._summary)
+            self.context.set_messages(messages)
+        self._summary["content"] = SUMMARY_PREFIX + summary
+
+
+async def summarize_with_groq(previous: str, messages: List[Dict[str, Any]]) -> str:
+    """Fold trimmed turns into the running summary with the shared Groq client."""
+    from llm import GROQ_MODEL, LLM_CLIENT
+
+    transcript = "\n".join(f"{message['role']}: {message.get('content')}" for message in messages)
+    prompt = (
+        f"Summary so far:\n{previous or '(none)'}\n\n"
+        f"Newer messages:\n{transcript}\n\n"
+        "Write an updated summary of this voice conversation in a few sentences. "
+        "Keep names, numbers and anything the user asked for or told the assistant."
+    )
+    return await LLM_CLIENT.complete(
+        [{"role": "user", "content": prompt}],
+        model=GROQ_MODEL,
+        temperature=0,
+        max_tokens=VOICE_HISTORY_SUMMARY_TOKENS,
+    )
@@ -0,0 +1,296 @@
+"""Per-turn latency tracing for the voice pipeline.
+
+TurnTracer is a pipecat observer: it sees every frame pushed between
+processors and timestamps the milestones of each user turn, from the end
+of speech (VAD stop) to the first audio the bot plays back. QueryProcessor
+adds the retrieval milestones with ``mark``. Finished turns go to a JSONL
+file and/or an OTLP/HTTP collector, and per-stage p50/p95 are kept for the
+session summary. A stage whose end comes before its start (e.g. no
+speculative retrieval) counts as 0 ms, in the file and the summary alike.
+
+Summarize a trace file: python -m voice_tracing traces/voice_turns.jsonl
+"""
+import asyncio
+import json
+import os
+import secrets
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from metrics import LatencyHistogram
+
+# JSONL file that receives one record per turn; empty disables it
+VOICE_TRACE_FILE = os.getenv("VOICE_TRACE_FILE", "")
+# OTLP/HTTP traces endpoint, e.g. http://localhost:4318/v1/traces; empty disables it
+VOICE_TRACE_OTLP_ENDPOINT = os.getenv("VOICE_TRACE_OTLP_ENDPOINT", "")
+
+# (stage, from milestone, to milestone); stages missing either end are skipped
+STAGES = (
+    # STT finalization: last interim words to the final transcript
+    ("transcript", "last_interim", "final_transcript"),
+    # The search itself, however much of it ran while the user was still speaking
+    ("retrieval", "retrieval_start", "retrieval_end"),
+    ("speculation_overlap", "retrieval_start", "retrieval_before_stop"),
+    ("to_llm_request", "vad_stop", "llm_request"),
+    ("llm_first_token", "llm_request", "llm_first_token"),
+    ("tts_first_audio", "llm_first_token", "first_audio"),
+    ("voice_to_voice", "vad_stop", "first_audio"),
+)
+
+# Finer than the default buckets: voice stages are tens to hundreds of milliseconds
+STAGE_BUCKETS_MS = (10, 25, 50, 75, 100, 150, 200, 300, 400, 500, 750, 1000, 1500, 2000, 3000, 5000, 10000)
+
+try:
+    from pipecat.frames.frames import (
+        BotStartedSpeakingFrame,
+        CancelFrame,
+        EndFrame,
+        InterimTranscriptionFrame,
+        LLMFullResponseEndFrame,
+        OutputAudioRawFrame,
+        TextFrame,
+        TranscriptionFrame,
+        UserStartedSpeakingFrame,
+        UserStoppedSpeakingFrame,
+    )
+    from pipecat.observers.base_observer import BaseObserver
+    from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContextFrame
+    from pipecat.services.ai_services import LLMService
+except ImportError:
+    # The summary command only reads trace files and does not need pipecat
+    BaseObserver = object
+
+
+class Turn:
+    """Milestones of one user turn, as perf_counter seconds."""
+
+    def __init__(self, number: int):
+        self.number = number
+        self.marks: Dict[str, float] = {}
+
+    def mark(self, name: str, at: Optional[float] = None) -> None:
+        self.marks.setdefault(name, time.perf_counter() if at is None else at)
+
+    def spans(self) -> List[Tuple[str, float, float]]:
+        """(stage, start, end) of each stage the turn has both milestones for, never ending before it starts."""
+        marks = dict(self.marks)
+        if "retrieval_end" in marks and "vad_stop" in marks:
+            marks["retrieval_before_stop"] = min(marks["retrieval_end"], marks["vad_stop"])
+        return [
+            (stage, marks[start], max(marks[start], marks[end]))
+            for stage, start, end in STAGES
+            if start in marks and end in marks
+        ]
+
+    def stages(self) -> Dict[str, float]:
+        return {stage: (end - start) * 1000 for stage, start, end in self.spans()}
+
+
+class TurnTracer(BaseObserver):
+    """Observer that turns pipeline frames into per-turn latency spans.
+
+    A turn opens at UserStartedSpeakingFrame (or at the VAD stop, if the
+    start was missed) and is closed and exported when the next one starts
+    or the pipeline ends. Offsets in exported records are milliseconds from
+    the VAD stop that ended the user's speech.
+    """
+
+    def __init__(
+        self,
+        session: str,
+        path: Optional[str] = VOICE_TRACE_FILE,
+        otlp_endpoint: Optional[str] = VOICE_TRACE_OTLP_ENDPOINT,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        super().__init__()
+        self.session = session
+        self.path = path
+        self.otlp_endpoint = otlp_endpoint
+        self.attributes = attributes or {}
+        self.stage_latency = {stage: LatencyHistogram(STAGE_BUCKETS_MS) for stage, _, _ in STAGES}
+        self.turns = 0
+        self._turn: Optional[Turn] = None
+        self._last_final = None
+        self._last_interim = None
+        self._file = None
+        self._exports = set()
+        # perf_counter -> unix time, for OTLP timestamps
+        self._epoch_offset_ns = time.time_ns() - time.perf_counter_ns()
+
+    def mark(self, name: str, at: Optional[float] = None) -> None:
+        """Record a milestone of the current turn from outside the frame flow (e.g. retrieval)."""
+        if self._turn is not None:
+            self._turn.mark(name, at)
+
+    async def on_push_frame(self, src, dst, frame, direction, timestamp: int):
+        if isinstance(frame, UserStartedSpeakingFrame):
+            if self._turn is None or "vad_stop" in self._turn.marks:
+                self._close()
+                self._turn = Turn(self.turns + 1)
+                self._turn.mark("speech_start")
+            return
+        if isinstance(frame, (EndFrame, CancelFrame)):
+            self._close()
+            return
+        if isinstance(frame, UserStoppedSpeakingFrame):
+            if self._turn is None:
+                self._turn = Turn(self.turns + 1)
+            self._turn.mark("vad_stop")
+            return
+
+        turn = self._turn
+        if turn is None:
+            return
+        if isinstance(frame, InterimTranscriptionFrame):
+            if frame.id != self._last_interim:
+                self._last_interim = frame.id
+                turn.mark("first_interim")
+                turn.marks["last_interim"] = time.perf_counter()
+        elif isinstance(frame, TranscriptionFrame):
+            # The final that completes the turn is the last one, first seen when STT pushes it
+            if frame.id != self._last_final:
+                self._last_final = frame.id
+                turn.marks["final_transcript"] = time.perf_counter()
+        elif isinstance(frame, OpenAILLMContextFrame) and isinstance(dst, LLMService):
+            turn.mark("llm_request")
+        elif isinstance(frame, TextFrame) and isinstance(src, LLMService):
+            turn.mark("llm_first_token")
+        elif isinstance(frame, LLMFullResponseEndFrame) and isinstance(src, LLMService):
+            turn.mark("llm_end")
+        elif isinstance(frame, (OutputAudioRawFrame, BotStartedSpeakingFrame)) and "llm_first_token" in turn.marks:
+            turn.mark("first_audio")
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "turns": self.turns,
+            **{
+                stage: {"count": h.count, "p50_ms": _round(h.percentile(50)), "p95_ms": _round(h.percentile(95))}
+                for stage, h in self.stage_latency.items()
+                if h.count
+            },
+        }
+
+    async def close(self) -> None:
+        self._close()
+        if self._exports:
+            await asyncio.gather(*self._exports, return_exceptions=True)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _close(self) -> None:
+        turn, self._turn = self._turn, None
+        if turn is None or "vad_stop" not in turn.marks:
+            return
+        self.turns += 1
+        stages = turn.stages()
+        for stage, ms in stages.items():
+            self.stage_latency[stage].observe(ms / 1000)
+        if self.path:
+            self._write(turn, stages)
+        if self.otlp_endpoint:
+            task = asyncio.ensure_future(self._export(turn, stages))
+            self._exports.add(task)
+            task.add_done_callback(self._exports.discard)
+
+    def _write(self, turn: Turn, stages: Dict[str, float]) -> None:
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+        origin = turn.marks["vad_stop"]
+        record = {
+            "session": self.session,
+            "turn": turn.number,
+            "time": round((origin * 1e9 + self._epoch_offset_ns) / 1e9, 3),
+            "marks_ms": {name: round((at - origin) * 1000, 1) for name, at in sorted(turn.marks.items(), key=lambda i: i[1])},
+            "stages_ms": {stage: round(ms, 1) for stage, ms in stages.items()},
+            **self.attributes,
+        }
+        self._file.write(json.dumps(record) + "\n")
+
+    async def _export(self, turn: Turn, stages: Dict[str, float]) -> None:
+        import aiohttp
+
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(self.otlp_endpoint, json=self._otlp_payload(turn)) as response:
+                    response.raise_for_status()
+        except Exception as e:
+            print(f"Exporting voice turn trace to {self.otlp_endpoint} failed: {e}")
+
+    def _otlp_payload(self, turn: Turn) -> Dict[str, Any]:
+        trace_id = secrets.token_hex(16)
+        root_id = secrets.token_hex(8)
+        start = min(turn.marks.values())
+        end = max(turn.marks.values())
+        spans = [self._span(trace_id, root_id, None, "voice.turn", start, end, {"turn": turn.number, **self.attributes})]
+        for stage, first, last in turn.spans():
+            spans.append(self._span(trace_id, secrets.token_hex(8), root_id, f"voice.{stage}", first, last, {}))
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": "voice_bot", "session": self.session})},
+                "scopeSpans": [{"scope": {"name": "voice_tracing"}, "spans": spans}],
+            }]
+        }
+
+    def _span(self, trace_id, span_id, parent_id, name, start, end, attributes) -> Dict[str, Any]:
+        span = {
+            "traceId": trace_id,
+            "spanId": span_id,
+            "name": name,
+            "kind": 1,
+            "startTimeUnixNano": str(int(start * 1e9) + self._epoch_offset_ns),
+            "endTimeUnixNano": str(int(end * 1e9) + self._epoch_offset_ns),
+            "attributes": _otlp_attributes(attributes),
+        }
+        if parent_id:
+            span["parentSpanId"] = parent_id
+        return span
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def value(v):
+        if isinstance(v, bool):
+            return {"boolValue": v}
+        if isinstance(v, int):
+            return {"intValue": str(v)}
+        if isinstance(v, float):
+            return {"doubleValue": v}
+        return {"stringValue": str(v)}
+    return [{"key": key, "value": value(v)} for key, v in attributes.items() if v is not None]
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 1)
+
+
+def summarize(path: str) -> Dict[str, Dict[str, float]]:
+    """Exact per-stage percentiles over the turns in a JSONL trace file."""
+    values: Dict[str, List[float]] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                for stage, ms in json.loads(line).get("stages_ms", {}).items():
+                    values.setdefault(stage, []).append(ms)
+    summary = {}
+    for stage, _, _ in STAGES:
+        stage_values = sorted(values.get(stage, []))
+        if not stage_values:
+            continue
+        p95 = statistics.quantiles(stage_values, n=20, method="inclusive")[-1] if len(stage_values) > 1 else stage_values[0]
+        summary[stage] = {
+            "count": len(stage_values),
+            "p50_ms": round(statistics.median(stage_values), 1),
+            "p95_ms": round(p95, 1),
+            "max_ms": round(stage_values[-1], 1),
+        }
+    return summary
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python -m voice_tracing <traces.jsonl>")
+    for stage, row in summarize(sys.argv[1]).items():
+        print(f"{stage:<20} n={row['count']:<5} p50 {row['p50_ms']:8.1f} ms  p95 {row['p95_ms']:8.1f} ms  max {row['max_ms']:8.1f} ms")